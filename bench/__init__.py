@@ -0,0 +1,15 @@
+"""
+Benchmark suite for the markdown pipeline.
+
+Run from the repository root:
+    PYTHONPATH=src python3 -m bench run [--pages N] [--blocks N] [--mix K=W,...] [--output FILE]
+    PYTHONPATH=src python3 -m bench compare BASELINE.json RESULTS.json [--threshold 0.1]
+    PYTHONPATH=src python3 -m bench memory [--pages N] [--content DIR] [--top N] [--output FILE]
+
+"run" generates a deterministic corpus (bench.corpus), times each pipeline stage on it
+(bench.stages) and saves the results as JSON. "compare" exits with status 1 when any stage of the
+new results is slower than the baseline by more than the threshold. "memory" reports the peak and
+retained memory of every page and pipeline stage (bench.memory).
+
+The other scripts in this directory are standalone micro-benchmarks of individual changes.
+"""
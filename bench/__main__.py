@@ -0,0 +1,152 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+
+from bench.compare import compare_results, format_rows, load_results
+from bench.corpus import DEFAULT_MIX, generate_corpus, parse_mix, write_corpus
+from bench.memory import report, run_memory
+from bench.stages import STAGES, TEMPLATE, run_stages
+from template import Template
+from utils import find_pages
+
+
+def parse_stage_threshold(text):
+    stage, _, threshold = text.partition("=")
+    if stage not in STAGES:
+        raise argparse.ArgumentTypeError(f"unknown stage: {stage}")
+    return stage, float(threshold)
+
+
+def add_corpus_arguments(parser):
+    parser.add_argument("--pages", type=int, default=100, help="documents in the corpus")
+    parser.add_argument("--blocks", type=int, default=40, help="blocks per document")
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=DEFAULT_MIX,
+        help="block kinds and weights, e.g. paragraph=3,links=1,emphasis=1",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed of the corpus generator")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python3 -m bench")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="time each pipeline stage on a synthetic corpus")
+    add_corpus_arguments(run)
+    run.add_argument("--repeat", type=int, default=5, help="runs per stage; the best is kept")
+    run.add_argument(
+        "--stages",
+        type=lambda text: text.split(","),
+        default=list(STAGES),
+        help=f"comma-separated stages to run (default: {','.join(STAGES)})",
+    )
+    run.add_argument("-o", "--output", help="write the results as JSON to this file")
+
+    compare = commands.add_parser(
+        "compare", help="fail if a stage got slower than a baseline by more than a threshold"
+    )
+    compare.add_argument("baseline", help="results JSON to compare against")
+    compare.add_argument("results", help="results JSON to check")
+    compare.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="allowed slowdown as a fraction of the baseline time (default 0.1 = 10%%)",
+    )
+    compare.add_argument(
+        "--stage-threshold",
+        type=parse_stage_threshold,
+        action="append",
+        default=[],
+        metavar="STAGE=FRACTION",
+        help="override the threshold for one stage; may be repeated",
+    )
+
+    memory = commands.add_parser(
+        "memory", help="measure peak and retained memory per page and per stage"
+    )
+    add_corpus_arguments(memory)
+    memory.add_argument(
+        "--content", help="measure the markdown pages under this directory instead of a corpus"
+    )
+    memory.add_argument("--template", help="page template (default: a minimal one)")
+    memory.add_argument("--top", type=int, default=15, help="allocating lines to report")
+    memory.add_argument("-o", "--output", help="write the results as JSON to this file")
+    return parser.parse_args(argv)
+
+
+def run(args):
+    for stage in args.stages:
+        if stage not in STAGES:
+            raise SystemExit(f"Unknown stage: {stage}. Use one of {', '.join(STAGES)}.")
+    documents = generate_corpus(args.pages, args.blocks, args.mix, args.seed)
+    stages = run_stages(documents, args.stages, args.repeat)
+    results = {
+        "meta": {
+            "pages": args.pages,
+            "blocks": args.blocks,
+            "mix": args.mix,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "bytes": sum(len(document.encode("utf-8")) for document in documents),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "stages": stages,
+    }
+    print(f"{args.pages} pages x {args.blocks} blocks, best of {args.repeat}")
+    for stage, stage_result in stages.items():
+        per_page = stage_result["best"] / args.pages * 1e6
+        print(f"{stage:<22}{stage_result['best'] * 1e3:>10.2f} ms{per_page:>10.1f} us/page")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+def compare(args):
+    baseline = load_results(args.baseline)
+    results = load_results(args.results)
+    for key in ("pages", "blocks", "mix", "seed"):
+        if baseline["meta"].get(key) != results["meta"].get(key):
+            print(f"Warning: the runs used different corpora ({key} differs)")
+    rows = compare_results(baseline, results, args.threshold, dict(args.stage_threshold))
+    print(format_rows(rows))
+    regressions = [row[0] for row in rows if row[4]]
+    if regressions:
+        print(f"Regressed past the threshold: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+def memory(args):
+    template = Template.from_file(args.template) if args.template else Template(TEMPLATE)
+    with tempfile.TemporaryDirectory() as root:
+        if args.content:
+            sources = [source for source, _ in find_pages(args.content, root)[0]]
+        else:
+            documents = generate_corpus(args.pages, args.blocks, args.mix, args.seed)
+            sources = write_corpus(documents, os.path.join(root, "content"))
+        results = run_memory(sources, template, args.top)
+    print(report(results))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+COMMANDS = {"run": run, "compare": compare, "memory": memory}
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    return COMMANDS[args.command](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
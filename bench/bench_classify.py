@@ -0,0 +1,84 @@
+"""
+Measures per-block classification cost of block_to_block_type with the precompiled pattern
+registry against the previous version, which passed pattern strings to re.match on every call.
+
+The "thrashed" rows purge the re module cache before every block, which is what happens once more
+distinct patterns are in use than the cache can hold.
+
+Run from the repository root:
+    PYTHONPATH=src python3 bench/bench_classify.py
+"""
+
+import re
+import timeit
+from markdown_to_html import BlockType, block_to_block_type
+
+
+BLOCKS = [
+    "## A sub-header",
+    "A plain paragraph of text with **bold** and *italic* words inside of it.",
+    "```\nfor i in range(10):\n    print(i)\n```",
+    "> Words can be like X-rays,\n> if you use them properly.",
+    "- First item\n- Second item\n- Third item",
+    "1. First item\n2. Second item\n3. Third item",
+]
+
+
+def previous_block_to_block_type(block):
+    match = re.match(r"(#+)\s", block)
+    if match and len(match.group(0)) <= 7:
+        return BlockType.HEADING
+
+    if re.match(r"^```([\s\S]*?)```(?=\Z)", block):
+        return BlockType.CODE
+
+    matches = re.match(r"^(\s*>\s*.*(\n|\Z))+$", block)
+    if matches:
+        return BlockType.QUOTE
+
+    matches = re.match(r"^(\s*[*-]\s+.+(\n|\Z))+$", block)
+    if matches:
+        return BlockType.UNORDERED_LIST
+
+    if re.match(r"^(\s*\d+\.\s+.+(\n|\Z))+$", block):
+        numbers = re.findall(r"^\s*(\d+)\.", block, re.MULTILINE)
+        numbers = [int(num) for num in numbers]
+        if numbers == list(range(1, len(numbers) + 1)):
+            return BlockType.ORDERED_LIST
+
+    return BlockType.PARAGRAPH
+
+
+def classify_all(func):
+    for block in BLOCKS:
+        func(block)
+
+
+def classify_all_thrashed(func):
+    for block in BLOCKS:
+        re.purge()
+        func(block)
+
+
+def bench(label, runner, func, number):
+    seconds = min(timeit.repeat(lambda: runner(func), number=number, repeat=5))
+    per_block = seconds / (number * len(BLOCKS)) * 1e9
+    print(f"  {label:<10} {per_block:10.0f} ns/block")
+    return per_block
+
+
+def main():
+    for block in BLOCKS:
+        assert block_to_block_type(block) == previous_block_to_block_type(block)
+    for label, runner, number in (
+        ("warm cache", classify_all, 20000),
+        ("thrashed", classify_all_thrashed, 200),
+    ):
+        print(f"{label}:")
+        old = bench("previous", runner, previous_block_to_block_type, number)
+        new = bench("compiled", runner, block_to_block_type, number)
+        print(f"  speedup    {old / new:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Times site discovery on a synthetic tree of 100k files: the old recursive os.listdir walk (one
+os.path.isfile stat per entry, one call per directory level) against the iterative os.scandir
+walk in utils.find_pages, which gets each entry's type from the directory listing. Both must
+find exactly the same pages, files and directories.
+
+Run from the repository root:
+    PYTHONPATH=src python3 bench/bench_discovery.py [files]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from utils import find_pages
+
+
+def find_pages_listdir(dir_path, dest_dir_path):
+    pages, files, dirs = [], [], []
+    for object in sorted(os.listdir(dir_path)):
+        full_path = os.path.join(dir_path, object)
+        if os.path.isfile(full_path):
+            base_name, ext = os.path.splitext(object)
+            if ext == ".md":
+                pages.append((full_path, os.path.join(dest_dir_path, base_name + ".html")))
+            else:
+                files.append((full_path, dest_dir_path))
+        else:
+            new_dest_dir_path = os.path.join(dest_dir_path, object)
+            dirs.append(new_dest_dir_path)
+            sub_pages, sub_files, sub_dirs = find_pages_listdir(full_path, new_dest_dir_path)
+            pages.extend(sub_pages)
+            files.extend(sub_files)
+            dirs.extend(sub_dirs)
+    return pages, files, dirs
+
+
+def best_of(func, root, runs=3):
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = func(os.path.join(root, "content"), os.path.join(root, "public"))
+        seconds = time.perf_counter() - started
+        best = seconds if best is None else min(best, seconds)
+    return result, best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as root:
+        for i in range(count):
+            dir_path = os.path.join(root, "content", f"section{i % 50}", f"topic{i % 1000}")
+            if i < 1000:
+                os.makedirs(dir_path)
+            name = f"post{i}.md" if i % 4 else f"image{i}.png"
+            open(os.path.join(dir_path, name), "w").close()
+
+        old, old_seconds = best_of(find_pages_listdir, root)
+        new, new_seconds = best_of(find_pages, root)
+        assert new == old, "scandir discovery found different work"
+        pages, files, dirs = new
+        print(f"{len(pages):,} pages, {len(files):,} other files, {len(dirs):,} directories")
+        print(f"os.listdir + isfile (recursive) {old_seconds:8.3f} s")
+        speedup = old_seconds / new_seconds
+        print(f"os.scandir (iterative)          {new_seconds:8.3f} s  {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Builds a synthetic site once with a BuildManifest, then times a no-op rebuild (nothing changed)
+and a rebuild after editing a single page.
+
+Run from the repository root:
+    PYTHONPATH=src python3 bench/bench_incremental.py [pages]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from manifest import BuildManifest
+from utils import generate_pages_recursive, put_file
+
+
+TEMPLATE = "<html><head><title> {{ Title }} </title></head><body> {{ Content }}</body></html>"
+
+
+def timed_build(root):
+    started = time.perf_counter()
+    manifest = BuildManifest.load(os.path.join(root, "manifest.json"))
+    with redirect_stdout(StringIO()):
+        rendered = generate_pages_recursive(
+            os.path.join(root, "content"),
+            os.path.join(root, "template.html"),
+            os.path.join(root, "public"),
+            manifest=manifest,
+        )
+    return rendered, time.perf_counter() - started
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with tempfile.TemporaryDirectory() as root:
+        put_file(os.path.join(root, "template.html"), TEMPLATE)
+        for i in range(pages):
+            page_path = os.path.join(root, "content", f"section{i % 100}", f"post{i}.md")
+            put_file(page_path, f"# Post {i}\n\nA paragraph with **bold** text.")
+
+        for label in ("full build", "no-op rebuild"):
+            rendered, seconds = timed_build(root)
+            print(f"{label:<16} {rendered:>6} pages rendered {seconds:8.3f} s")
+
+        put_file(os.path.join(root, "content", "section0", "post0.md"), "# Post 0\n\nEdited.")
+        rendered, seconds = timed_build(root)
+        print(f"{'one page edited':<16} {rendered:>6} pages rendered {seconds:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
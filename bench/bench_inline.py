@@ -0,0 +1,162 @@
+"""
+Compares the single-pass text_to_textnodes scanner against the original five-pass pipeline
+(split_nodes_link -> split_nodes_image -> split_nodes_delimiter x3). The helpers of that pipeline
+have since been rewritten, so the versions it ran are kept here as original_*.
+
+Run from the repository root:
+    PYTHONPATH=src python3 bench/bench_inline.py
+"""
+
+import re
+import timeit
+from inline_markdown import text_to_textnodes
+from textnode import TextNode, TextType
+
+
+SENTENCE = (
+    "This is **bold text** with an *italic* word, a `code span`, an "
+    "![image](https://example.com/img.png) and a [link](https://example.com). "
+)
+
+
+def original_split_nodes_delimiter(old_nodes, delimiter, text_type):
+    delim = {TextType.BOLD: "**", TextType.ITALIC: "*", TextType.CODE: "`"}
+    new_nodes = []
+    for node in old_nodes:
+        if text_type not in delim:
+            raise Exception("Invalid text_type.")
+        if delimiter != delim[text_type]:
+            raise Exception("Delimiter argument does not match the text_type argument.")
+        if node.text.count(delimiter) % 2 != 0:
+            raise Exception(f"Invalid mardown syntax: no closing delimiter for '{delimiter}'.")
+
+        if node.text_type != TextType.TEXT:
+            new_nodes.append(node)
+        else:
+            text_builder = ""
+            is_new_type = False
+            i = 0
+            text = node.text
+            while i < len(text):
+                if text_type == TextType.BOLD:
+                    if i < len(text) - 1 and text[i] == "*" and text[i + 1] == "*":
+                        if is_new_type == False:
+                            is_new_type = True
+                            current_type = node.text_type
+                        else:
+                            is_new_type = False
+                            current_type = text_type
+                        if text_builder:
+                            new_nodes.append(TextNode(text_builder, current_type))
+                            text_builder = ""
+                        i += 2
+                    else:
+                        text_builder += text[i]
+                        i += 1
+                else:
+                    if text[i] == delimiter:
+                        if i < len(text) - 1 and text[i] == "*" and text[i + 1] == "*":
+                            text_builder += "**"
+                            i += 1
+                        else:
+                            if text[i] == delimiter:
+                                if is_new_type == False:
+                                    is_new_type = True
+                                    current_type = node.text_type
+                                else:
+                                    is_new_type = False
+                                    current_type = text_type
+                                if text_builder:
+                                    new_nodes.append(TextNode(text_builder, current_type))
+                                    text_builder = ""
+                    else:
+                        text_builder += text[i]
+                    i += 1
+            if text_builder:
+                current_type = text_type if is_new_type else node.text_type
+                new_nodes.append(TextNode(text_builder, current_type))
+    return new_nodes
+
+
+def original_extract_markdown_images(text):
+    return re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+
+
+def original_extract_markdown_links(text):
+    matches = re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    for i, match in enumerate(matches):
+        if not match[0]:
+            matches[i] = match[1], match[1]
+    return matches
+
+
+def original_split_nodes_image(old_nodes):
+    new_nodes = []
+    for node in old_nodes:
+        images = original_extract_markdown_images(node.text)
+        if not images:
+            new_nodes.append(node)
+        else:
+            text = node.text
+            for image_elements in images:
+                image = f"![{image_elements[0]}]({image_elements[1]})"
+                text_chunks = text.split(image, 1)
+                if text_chunks[0]:
+                    new_nodes.append(TextNode(text_chunks[0], TextType.TEXT))
+                new_nodes.append(
+                    TextNode(image_elements[0], TextType.IMAGE, url=image_elements[1])
+                )
+                text = text_chunks[1]
+            if text:
+                new_nodes.append(TextNode(text, TextType.TEXT))
+    return new_nodes
+
+
+def original_split_nodes_link(old_nodes):
+    new_nodes = []
+    for node in old_nodes:
+        links = original_extract_markdown_links(node.text)
+        if not links:
+            new_nodes.append(node)
+        else:
+            text = node.text
+            for link_elements in links:
+                link = f"[{link_elements[0]}]({link_elements[1]})"
+                text_chunks = text.split(link, 1)
+                if text_chunks[0]:
+                    new_nodes.append(TextNode(text_chunks[0], TextType.TEXT))
+                new_nodes.append(TextNode(link_elements[0], TextType.LINK, url=link_elements[1]))
+                text = text_chunks[1]
+            if text:
+                new_nodes.append(TextNode(text, TextType.TEXT))
+    return new_nodes
+
+
+def five_pass_pipeline(text):
+    nodes = original_split_nodes_link([TextNode(text, TextType.TEXT)])
+    nodes = original_split_nodes_image(nodes)
+    nodes = original_split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = original_split_nodes_delimiter(nodes, "*", TextType.ITALIC)
+    return original_split_nodes_delimiter(nodes, "`", TextType.CODE)
+
+
+def bench(label, func, text, number):
+    seconds = min(timeit.repeat(lambda: func(text), number=number, repeat=3))
+    per_call = seconds / number * 1e6
+    print(f"  {label:<12} {per_call:12.1f} us/call")
+    return per_call
+
+
+def main():
+    for sentences in (1, 10, 100):
+        text = SENTENCE * sentences
+        assert text_to_textnodes(text) == five_pass_pipeline(text)
+        number = max(1, 2000 // sentences)
+        print(f"{len(text):,} chars ({sentences} sentences):")
+        old = bench("five-pass", five_pass_pipeline, text, number)
+        new = bench("single-pass", text_to_textnodes, text, number)
+        print(f"  speedup      {old / new:12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
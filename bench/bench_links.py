@@ -0,0 +1,90 @@
+"""
+Benchmarks split_nodes_link and split_nodes_image on link-dense paragraphs against the previous
+implementation, which rebuilt each match's markdown source and called str.split on the remaining
+text once per match.
+
+Run from the repository root:
+    PYTHONPATH=src python3 bench/bench_links.py
+"""
+
+import timeit
+from inline_markdown import (
+    extract_markdown_images,
+    extract_markdown_links,
+    split_nodes_image,
+    split_nodes_link,
+)
+from textnode import TextNode, TextType
+
+
+def previous_split_nodes_image(old_nodes):
+    new_nodes = []
+    for node in old_nodes:
+        images = extract_markdown_images(node.text)
+        if not images:
+            new_nodes.append(node)
+        else:
+            text = node.text
+            for image_elements in images:
+                image = f"![{image_elements[0]}]({image_elements[1]})"
+                text_chunks = text.split(image, 1)
+                if text_chunks[0]:
+                    new_nodes.append(TextNode(text_chunks[0], TextType.TEXT))
+                new_nodes.append(
+                    TextNode(image_elements[0], TextType.IMAGE, url=image_elements[1])
+                )
+                text = text_chunks[1]
+            if text:
+                new_nodes.append(TextNode(text, TextType.TEXT))
+    return new_nodes
+
+
+def previous_split_nodes_link(old_nodes):
+    new_nodes = []
+    for node in old_nodes:
+        links = extract_markdown_links(node.text)
+        if not links:
+            new_nodes.append(node)
+        else:
+            text = node.text
+            for link_elements in links:
+                link = f"[{link_elements[0]}]({link_elements[1]})"
+                text_chunks = text.split(link, 1)
+                if text_chunks[0]:
+                    new_nodes.append(TextNode(text_chunks[0], TextType.TEXT))
+                new_nodes.append(TextNode(link_elements[0], TextType.LINK, url=link_elements[1]))
+                text = text_chunks[1]
+            if text:
+                new_nodes.append(TextNode(text, TextType.TEXT))
+    return new_nodes
+
+
+def paragraph(count, markup):
+    return " ".join(f"see {markup}[page {i}](https://example.com/{i}) here" for i in range(count))
+
+
+def bench(label, func, nodes, number):
+    seconds = min(timeit.repeat(lambda: func(nodes), number=number, repeat=3))
+    per_call = seconds / number * 1e3
+    print(f"  {label:<9} {per_call:10.2f} ms/call")
+    return per_call
+
+
+def main():
+    cases = (
+        ("links", "", split_nodes_link, previous_split_nodes_link),
+        ("images", "!", split_nodes_image, previous_split_nodes_image),
+    )
+    for count in (10, 100, 1000):
+        for label, markup, current, previous in cases:
+            nodes = [TextNode(paragraph(count, markup), TextType.TEXT)]
+            assert current(nodes) == previous(nodes)
+            number = max(1, 2000 // count)
+            print(f"{count:,} {label} per paragraph:")
+            old = bench("previous", previous, nodes, number)
+            new = bench("spans", current, nodes, number)
+            print(f"  speedup   {old / new:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
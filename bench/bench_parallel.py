@@ -0,0 +1,83 @@
+"""
+Times generate_pages_recursive on a synthetic site with an increasing number of worker processes
+and checks that every parallel build writes exactly the same files as the serial one.
+
+Run from the repository root:
+    PYTHONPATH=src python3 bench/bench_parallel.py [pages]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from utils import generate_pages_recursive, put_file
+
+
+TEMPLATE = "<html><head><title> {{ Title }} </title></head><body> {{ Content }}</body></html>"
+
+PAGE = """# Post {i}
+
+An opening paragraph with **bold**, *italic* and `code`, plus a [link](https://example.com/{i}).
+
+- first point
+- second point with ![an image](/images/{i}.png)
+
+> A quote that runs
+> over two lines.
+
+```
+print("post {i}")
+```
+"""
+
+
+def make_site(root, pages):
+    for i in range(pages):
+        body = "\n\n".join([PAGE.format(i=i)] + ["Filler paragraph with *emphasis*."] * 40)
+        put_file(os.path.join(root, "content", f"section{i % 20}", f"post{i}.md"), body)
+    put_file(os.path.join(root, "template.html"), TEMPLATE)
+
+
+def read_tree(root):
+    contents = {}
+    for dir_path, _, file_names in os.walk(root):
+        for file_name in file_names:
+            path = os.path.join(dir_path, file_name)
+            with open(path, encoding="utf-8") as f:
+                contents[os.path.relpath(path, root)] = f.read()
+    return contents
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    cpus = os.cpu_count() or 1
+    job_counts = sorted({1, 2, 4, 8, cpus} & set(range(1, cpus + 1)))
+    with tempfile.TemporaryDirectory() as root:
+        make_site(root, pages)
+        baseline = None
+        serial_seconds = None
+        print(f"{pages:,} pages, {cpus} CPUs")
+        for jobs in job_counts:
+            dest = os.path.join(root, f"public-{jobs}")
+            started = time.perf_counter()
+            content = os.path.join(root, "content")
+            template = os.path.join(root, "template.html")
+            with redirect_stdout(StringIO()):
+                generate_pages_recursive(content, template, dest, jobs=jobs)
+            seconds = time.perf_counter() - started
+            output = read_tree(dest)
+            if baseline is None:
+                baseline, serial_seconds = output, seconds
+            assert output == baseline, f"--jobs {jobs} output differs from the serial build"
+            speedup = serial_seconds / seconds
+            efficiency = speedup / jobs
+            print(
+                f"  --jobs {jobs:<3} {seconds:8.2f} s  {speedup:5.2f}x  "
+                f"({efficiency:.0%} per core)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Load-tests the render-on-request preview server against the current approach of building public/
+and serving it with http.server. Both servers run in their own process; the client hits every
+page from a pool of threads for a fixed time and reports requests per second.
+
+Run from the repository root:
+    PYTHONPATH=src python3 bench/bench_server.py [pages] [seconds] [threads]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from http.client import HTTPConnection
+from io import StringIO
+from utils import generate_pages_recursive, put_file
+
+
+TEMPLATE = "<html><head><title> {{ Title }} </title></head><body> {{ Content }}</body></html>"
+MARKDOWN = """# Post {i}
+
+A paragraph with **bold** text, *italic* text and a [link](https://www.boot.dev).
+
+- First item
+- Second item
+
+> A quote
+
+```
+code block
+```
+"""
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "main.py")
+
+
+def start(command, cwd, port):
+    process = subprocess.Popen(
+        command, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    for _ in range(100):
+        try:
+            connection = HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("HEAD", "/")
+            connection.getresponse().read()
+            connection.close()
+            return process
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError(f"{command} did not start on port {port}")
+
+
+def load(port, paths, seconds, threads, headers=None):
+    """Requests paths round-robin from each thread for the given time; returns requests/second"""
+    counts = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def client(index):
+        connection = HTTPConnection("127.0.0.1", port)
+        i = index
+        while time.perf_counter() < deadline:
+            connection.request("GET", paths[i % len(paths)], headers=headers or {})
+            connection.getresponse().read()
+            counts[index] += 1
+            i += 1
+        connection.close()
+
+    workers = [threading.Thread(target=client, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return sum(counts) / seconds
+
+
+def etags(port, paths):
+    connection = HTTPConnection("127.0.0.1", port)
+    tags = {}
+    for path in paths:
+        connection.request("GET", path)
+        response = connection.getresponse()
+        response.read()
+        tags[path] = response.getheader("ETag")
+    connection.close()
+    return tags
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 3
+    threads = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    paths = [f"/section{i % 10}/post{i}.html" for i in range(pages)]
+
+    with tempfile.TemporaryDirectory() as root:
+        put_file(os.path.join(root, "template.html"), TEMPLATE)
+        for i in range(pages):
+            page_path = os.path.join(root, "content", f"section{i % 10}", f"post{i}.md")
+            put_file(page_path, MARKDOWN.format(i=i))
+        put_file(os.path.join(root, "content", "index.md"), MARKDOWN.format(i="index"))
+        os.makedirs(os.path.join(root, "static"))
+        with redirect_stdout(StringIO()):
+            generate_pages_recursive(
+                os.path.join(root, "content"),
+                os.path.join(root, "template.html"),
+                os.path.join(root, "public"),
+            )
+
+        results = []
+        static = start(
+            [sys.executable, "-m", "http.server", "8901", "--directory", "public"], root, 8901
+        )
+        try:
+            results.append(("http.server on public/", load(8901, paths, seconds, threads)))
+        finally:
+            static.kill()
+            static.wait()
+
+        preview = start([sys.executable, MAIN, "serve", "--port", "8902"], root, 8902)
+        try:
+            results.append(("preview, cache warming", load(8902, paths, seconds, threads)))
+            results.append(("preview, cached", load(8902, paths, seconds, threads)))
+            gzip_headers = {"Accept-Encoding": "gzip"}
+            rate = load(8902, paths, seconds, threads, gzip_headers)
+            results.append(("preview, cached + gzip", rate))
+            tags = etags(8902, paths)
+            conditional = [(path, {"If-None-Match": tag}) for path, tag in tags.items()]
+            counts = []
+            deadline = time.perf_counter() + seconds
+            connection = HTTPConnection("127.0.0.1", 8902)
+            while time.perf_counter() < deadline:
+                path, headers = conditional[len(counts) % len(conditional)]
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                counts.append(response.status)
+            connection.close()
+            assert set(counts) == {304}, set(counts)
+            results.append(("preview, 304 (1 thread)", len(counts) / seconds))
+        finally:
+            preview.kill()
+            preview.wait()
+
+    print(f"{pages} pages, {threads} client threads, {seconds:g} s per run")
+    for label, rate in results:
+        print(f"{label:<26} {rate:10.0f} requests/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Compares two benchmark result files stage by stage."""
+
+import json
+
+
+def load_results(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_results(baseline, results, threshold=0.1, stage_thresholds=None):
+    """
+    Compares the best time of every stage present in both baseline and results.
+
+    Args:
+        baseline (dict): results of an earlier run, as saved by "python3 -m bench run"
+        results (dict): the results to check
+        threshold (float): the slowdown allowed before a stage counts as a regression, as a
+            fraction of the baseline time (0.1 = 10% slower)
+        stage_thresholds (dict): per-stage overrides of threshold
+
+    Returns:
+        list: one (stage, baseline seconds, new seconds, change, regressed) row per stage, where
+        change is the relative change in time (positive is slower)
+    """
+    stage_thresholds = stage_thresholds or {}
+    rows = []
+    for stage, stage_result in results["stages"].items():
+        if stage not in baseline["stages"]:
+            continue
+        before = baseline["stages"][stage]["best"]
+        after = stage_result["best"]
+        change = after / before - 1 if before else 0.0
+        regressed = change > stage_thresholds.get(stage, threshold)
+        rows.append((stage, before, after, change, regressed))
+    return rows
+
+
+def format_rows(rows):
+    lines = [f"{'stage':<22}{'baseline ms':>14}{'new ms':>12}{'change':>10}"]
+    for stage, before, after, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        lines.append(f"{stage:<22}{before * 1e3:>14.2f}{after * 1e3:>12.2f}{change:>+10.1%}{flag}")
+    return "\n".join(lines)
@@ -0,0 +1,152 @@
+"""
+Deterministic generator of synthetic markdown corpora.
+
+Documents are built from a fixed vocabulary with a seeded random.Random, so the same arguments
+produce byte-for-byte the same corpus on every machine and Python version. The mix sets how often
+each kind of block appears.
+"""
+
+import os
+import random
+
+
+BLOCK_KINDS = (
+    "paragraph",
+    "heading",
+    "unordered_list",
+    "ordered_list",
+    "quote",
+    "code",
+    "links",
+    "emphasis",
+)
+
+DEFAULT_MIX = {
+    "paragraph": 30,
+    "heading": 8,
+    "unordered_list": 10,
+    "ordered_list": 6,
+    "quote": 6,
+    "code": 6,
+    "links": 17,
+    "emphasis": 17,
+}
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog while river mountain forest ancient road "
+    "traveller lantern evening morning castle harbour silver golden winter summer story "
+    "letter garden window stone bridge valley shadow light music voice market journey"
+).split()
+
+CODE_LINES = (
+    "def render(page):",
+    "    return template.render(page.title, page.html)",
+    "for block in blocks:",
+    "    nodes.append(block_to_node(block))",
+    "print(len(nodes))",
+)
+
+
+def parse_mix(text):
+    """
+    Parses a mix such as "paragraph=3,code=1" into {kind: weight}. Kinds that aren't named get a
+    weight of 0.
+    """
+    mix = {}
+    for item in text.split(","):
+        kind, _, weight = item.partition("=")
+        kind = kind.strip()
+        if kind not in BLOCK_KINDS:
+            raise ValueError(f"Unknown block kind: {kind}. Use one of {', '.join(BLOCK_KINDS)}.")
+        mix[kind] = int(weight)
+    return mix
+
+
+def words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def sentence(rng):
+    text = words(rng, rng.randint(6, 16))
+    return text[0].upper() + text[1:] + "."
+
+
+def emphasis(rng):
+    style = rng.randrange(3)
+    text = words(rng, rng.randint(1, 3))
+    if style == 0:
+        return f"**{text}**"
+    if style == 1:
+        return f"*{text}*"
+    return f"`{text}`"
+
+
+def link(rng):
+    slug = "-".join(words(rng, 2).split())
+    if rng.randrange(4) == 0:
+        return f"![{words(rng, 2)}](/images/{slug}.png)"
+    return f"[{words(rng, rng.randint(1, 3))}](https://example.com/{slug})"
+
+
+def inline_text(rng, sentences, spans, span):
+    """Some sentences with the given number of spans (made by span(rng)) inserted at random"""
+    parts = words(rng, sentences * 10).split()
+    for _ in range(spans):
+        parts.insert(rng.randrange(len(parts) + 1), span(rng))
+    return " ".join(parts) + "."
+
+
+def generate_block(rng, kind):
+    if kind == "paragraph":
+        return " ".join(sentence(rng) for _ in range(rng.randint(2, 5)))
+    if kind == "heading":
+        return "#" * rng.randint(2, 4) + " " + words(rng, rng.randint(2, 6)).title()
+    if kind == "unordered_list":
+        return "\n".join(f"- {words(rng, rng.randint(3, 9))}" for _ in range(rng.randint(2, 6)))
+    if kind == "ordered_list":
+        count = rng.randint(2, 6)
+        return "\n".join(f"{i}. {words(rng, rng.randint(3, 9))}" for i in range(1, count + 1))
+    if kind == "quote":
+        return "\n".join(f"> {sentence(rng)}" for _ in range(rng.randint(1, 4)))
+    if kind == "code":
+        lines = [rng.choice(CODE_LINES) for _ in range(rng.randint(2, 8))]
+        return "```\n" + "\n".join(lines) + "\n```"
+    if kind == "links":
+        return inline_text(rng, rng.randint(2, 4), rng.randint(4, 10), link)
+    if kind == "emphasis":
+        return inline_text(rng, rng.randint(2, 4), rng.randint(4, 12), emphasis)
+    raise ValueError(f"Unknown block kind: {kind}")
+
+
+def generate_document(rng, index, blocks, mix):
+    kinds = [kind for kind in BLOCK_KINDS if mix.get(kind)]
+    weights = [mix[kind] for kind in kinds]
+    parts = [f"# Page {index}: {words(rng, 3).title()}"]
+    for kind in rng.choices(kinds, weights, k=blocks):
+        parts.append(generate_block(rng, kind))
+    return "\n\n".join(parts) + "\n"
+
+
+def generate_corpus(pages=100, blocks=40, mix=None, seed=0):
+    """
+    Returns a list of pages markdown documents, each with an H1 title followed by blocks blocks
+    drawn according to mix (DEFAULT_MIX when None).
+    """
+    mix = DEFAULT_MIX if mix is None else mix
+    if not any(mix.values()):
+        raise ValueError("The mix must give at least one block kind a weight.")
+    rng = random.Random(seed)
+    return [generate_document(rng, i, blocks, mix) for i in range(pages)]
+
+
+def write_corpus(documents, content_dir, sections=10):
+    """Writes the documents to content_dir/section<n>/page<i>.md and returns their paths"""
+    paths = []
+    for i, document in enumerate(documents):
+        dir_path = os.path.join(content_dir, f"section{i % sections}")
+        os.makedirs(dir_path, exist_ok=True)
+        path = os.path.join(dir_path, f"page{i}.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(document)
+        paths.append(path)
+    return paths
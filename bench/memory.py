@@ -0,0 +1,159 @@
+"""
+Measures the memory each page of a build needs, with tracemalloc.
+
+Every page is first run through the pipeline one stage at a time, with each stage's output kept
+alive until the page is done:
+    markdown: the source text read from disk
+    blocks: scan_blocks, the type and span of every block
+    textnodes: text_to_textnodes on the text of every paragraph and heading
+    tree: markdown_to_document, the node tree with the title and other metadata
+    html: to_html on the tree
+    output: the page rendered into the template
+and then built again, from scratch, with generate_page.
+
+For each stage, peak is the most memory allocated at any moment while it ran and retained is what
+was still allocated when it returned, both counted from the start of the stage. The peak of
+generate_page is what a worker needs, over its baseline, to build that page.
+
+The memory still held once every stage of a page has run is grouped by the source line that
+allocated it and summed over the corpus. That shows which lines keep the most memory alive. It
+can't show who allocated the peak, because tracemalloc only snapshots what is allocated now.
+"""
+
+import os
+import tracemalloc
+from tempfile import TemporaryDirectory
+
+from inline_markdown import text_to_textnodes
+from markdown_to_html import BlockType, get_heading_level, markdown_to_document, scan_blocks
+from profiler import percentile
+from utils import generate_page, get_file
+
+
+STAGES = ("markdown", "blocks", "textnodes", "tree", "html", "output")
+PERCENTILES = (50, 90)
+
+# Leave tracemalloc's own bookkeeping and the import system out of the allocator report
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def measure(func):
+    """Calls func and returns (its result, {"peak": bytes, "retained": bytes})"""
+    before = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    result = func()
+    current, peak = tracemalloc.get_traced_memory()
+    return result, {"peak": peak - before, "retained": current - before}
+
+
+def inline_texts(markdown, blocks):
+    """The in-line markdown of the paragraph and heading blocks, from scan_blocks records"""
+    texts = []
+    for block_type, (start, end) in blocks:
+        if block_type == BlockType.PARAGRAPH:
+            texts.append(markdown[start:end])
+        elif block_type == BlockType.HEADING:
+            texts.append(get_heading_level(markdown[start:end])[1])
+    return texts
+
+
+def measure_page(source, dest, template, allocators):
+    """
+    Measures every stage of one page, then generate_page on its own. What the stages left
+    allocated is added to allocators, {(filename, line number): [bytes, blocks]}.
+    """
+    before = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+    stages = {}
+    markdown, stages["markdown"] = measure(lambda: get_file(source))
+    blocks, stages["blocks"] = measure(lambda: list(scan_blocks(markdown)))
+    texts = inline_texts(markdown, blocks)
+    textnodes, stages["textnodes"] = measure(lambda: [text_to_textnodes(text) for text in texts])
+    document, stages["tree"] = measure(lambda: markdown_to_document(markdown))
+    html, stages["html"] = measure(document.node.to_html)
+    output, stages["output"] = measure(lambda: template.render(str(document.title), html))
+
+    after = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+    for stat in after.compare_to(before, "lineno"):
+        if stat.size_diff > 0:
+            frame = stat.traceback[0]
+            totals = allocators.setdefault((frame.filename, frame.lineno), [0, 0])
+            totals[0] += stat.size_diff
+            totals[1] += stat.count_diff
+    del markdown, blocks, texts, textnodes, document, html, output, before, after
+
+    _, page = measure(lambda: generate_page(source, None, dest, verbose=False, template=template))
+    return {"source": source, "bytes": os.path.getsize(source), "stages": stages, "page": page}
+
+
+def run_memory(sources, template, top=15):
+    """
+    Measures each markdown file in sources, rendering into the compiled Template template.
+
+    Returns:
+        dict: {"pages": [{"source", "bytes", "stages": {stage: {"peak", "retained"}}, "page"}],
+        "allocators": [{"line", "bytes", "blocks"}]} with the top largest allocators first
+    """
+    pages = []
+    allocators = {}
+    tracemalloc.start()
+    try:
+        with TemporaryDirectory() as root:
+            for i, source in enumerate(sources):
+                dest = os.path.join(root, f"page{i}.html")
+                pages.append(measure_page(source, dest, template, allocators))
+    finally:
+        tracemalloc.stop()
+
+    largest = sorted(allocators.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    return {
+        "pages": pages,
+        "allocators": [
+            {"line": f"{short_path(filename)}:{lineno}", "bytes": size, "blocks": count}
+            for (filename, lineno), (size, count) in largest
+        ],
+    }
+
+
+def short_path(filename):
+    relative = os.path.relpath(filename)
+    return filename if relative.startswith("..") else relative
+
+
+def report(results):
+    """Returns the results of run_memory as a text table"""
+    pages = results["pages"]
+    markdown_bytes = sum(page["bytes"] for page in pages)
+    lines = [
+        f"Memory of {len(pages)} pages ({markdown_bytes:,} bytes of markdown), in KiB",
+        f"{'stage':<14}"
+        + "".join(f"{f'peak p{p}':>11}" for p in PERCENTILES)
+        + f"{'peak max':>11}"
+        + "".join(f"{f'retained p{p}':>14}" for p in PERCENTILES)
+        + f"{'retained max':>14}",
+    ]
+    rows = [(stage, [page["stages"][stage] for page in pages]) for stage in STAGES]
+    rows.append(("generate_page", [page["page"] for page in pages]))
+    for name, measurements in rows:
+        columns = []
+        for key in ("peak", "retained"):
+            values = sorted(measurement[key] for measurement in measurements)
+            columns += [percentile(values, p) for p in PERCENTILES] + [values[-1] if values else 0]
+        peaks = "".join(f"{value / 1024:>11.1f}" for value in columns[:3])
+        retained = "".join(f"{value / 1024:>14.1f}" for value in columns[3:])
+        lines.append(f"{name:<14}{peaks}{retained}")
+
+    if pages:
+        ratio = max(page["page"]["peak"] / max(page["bytes"], 1) for page in pages)
+        lines.append(f"generate_page peaks at up to {ratio:.1f} times the size of its markdown")
+    if results["allocators"]:
+        lines.append("Largest allocations kept by the stages, summed over all pages:")
+    for allocator in results["allocators"]:
+        lines.append(
+            f"{allocator['bytes'] / 1024:>11.1f} KiB {allocator['blocks']:>9} blocks  "
+            f"{allocator['line']}"
+        )
+    return "\n".join(lines)
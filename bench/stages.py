@@ -0,0 +1,94 @@
+"""
+Times each stage of the markdown pipeline separately over a corpus.
+
+    scan: scan_blocks on every document, which splits and classifies its blocks
+    block_<type>: block_to_node on every block of that type (block_paragraph, block_heading, ...)
+    inline: text_to_textnodes on the text of every paragraph
+    tree: markdown_to_document on every document, as generate_page calls it
+    serialize: to_html on every document's node tree
+    build: generate_pages_recursive over the corpus written to a temporary directory
+
+Each stage's input is prepared before it is timed, so a stage only measures its own work. A stage
+is run repeat times and its best (lowest) time is reported, which is the least noisy estimate.
+"""
+
+import os
+import tempfile
+import time
+from io import StringIO
+from shutil import rmtree
+
+import buildlog
+from bench.corpus import write_corpus
+from inline_markdown import text_to_textnodes
+from markdown_to_html import BlockType, block_to_node, markdown_to_document, scan_blocks
+from utils import generate_pages_recursive
+
+
+BLOCK_STAGES = tuple(f"block_{block_type.name.lower()}" for block_type in BlockType)
+STAGES = ("scan", *BLOCK_STAGES, "inline", "tree", "serialize", "build")
+TEMPLATE = "<html><head><title> {{ Title }} </title></head><body> {{ Content }}</body></html>"
+
+
+def time_runs(func, repeat):
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - started)
+    return runs
+
+
+def stage_functions(documents, root):
+    """Returns {stage: function} for every stage, with the inputs each stage needs prepared"""
+    blocks = {block_type: [] for block_type in BlockType}
+    for document in documents:
+        for block_type, (start, end) in scan_blocks(document):
+            blocks[block_type].append(document[start:end])
+    trees = [markdown_to_document(document).node for document in documents]
+
+    content_dir = os.path.join(root, "content")
+    public_dir = os.path.join(root, "public")
+    template_path = os.path.join(root, "template.html")
+    write_corpus(documents, content_dir)
+    with open(template_path, "w", encoding="utf-8") as f:
+        f.write(TEMPLATE)
+
+    def build():
+        if os.path.exists(public_dir):
+            rmtree(public_dir)
+        generate_pages_recursive(content_dir, template_path, public_dir)
+
+    def block_nodes(block_type):
+        return lambda: [block_to_node(block, block_type) for block in blocks[block_type]]
+
+    functions = {"scan": lambda: [list(scan_blocks(document)) for document in documents]}
+    for block_type, stage in zip(BlockType, BLOCK_STAGES):
+        functions[stage] = block_nodes(block_type)
+    paragraphs = blocks[BlockType.PARAGRAPH]
+    functions["inline"] = lambda: [text_to_textnodes(paragraph) for paragraph in paragraphs]
+    functions["tree"] = lambda: [markdown_to_document(document) for document in documents]
+    functions["serialize"] = lambda: [tree.to_html() for tree in trees]
+    functions["build"] = build
+    return functions
+
+
+def run_stages(documents, stages=STAGES, repeat=5):
+    """
+    Times the given stages over documents.
+
+    Returns:
+        dict: {stage: {"best": seconds, "runs": [seconds, ...]}}
+    """
+    results = {}
+    log = buildlog.log
+    buildlog.configure(buildlog.QUIET, stream=StringIO())
+    try:
+        with tempfile.TemporaryDirectory() as root:
+            functions = stage_functions(documents, root)
+            for stage in stages:
+                runs = time_runs(functions[stage], repeat)
+                results[stage] = {"best": min(runs), "runs": runs}
+    finally:
+        buildlog.log = log
+    return results
@@ -1,4 +1,4 @@
 #! /usr/bin/env bash
 
-python3 src/main.py
+python3 src/main.py "$@"
 cd public && python3 -m http.server 8888
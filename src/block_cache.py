@@ -0,0 +1,41 @@
+class BlockCache:
+    """
+    The rendered HTML of every block of each document, kept between renders so that re-rendering
+    an edited document only parses and serializes the blocks the edit touched.
+
+    Fragments are looked up by the exact source text of their block, which is all a block's HTML
+    depends on. Each render replaces the document's fragments with those of its current blocks,
+    so the cache holds one copy of each document and never fills up with old versions.
+
+        documents: {document key (its source path): {block text: (html, heading)}}, where heading
+            is the (tag, text) of a heading block and None for other blocks
+        hits, misses: running counts of blocks reused and blocks rendered
+    """
+
+    def __init__(self):
+        self.documents = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.documents)
+
+    def __repr__(self):
+        return f"BlockCache(documents={len(self)}, hits={self.hits}, misses={self.misses})"
+
+    def fragments(self, key):
+        """Returns the {block text: (html, heading)} fragments of the document's last render"""
+        return self.documents.get(key, {})
+
+    def replace(self, key, fragments):
+        self.documents[key] = fragments
+
+    def discard(self, key):
+        self.documents.pop(key, None)
+
+    def stats(self):
+        return {"documents": len(self), "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        self.documents.clear()
+        self.hits = self.misses = 0
@@ -0,0 +1,167 @@
+"""
+Buffered build log shared by utils, watch and main.
+
+Builds report what they do as events (a page rendered, an asset copied, a file removed, ...)
+instead of printing a line per file. Events are counted, and written only if the log level asks
+for them; what is written is buffered and sent to the stream in large writes. Every build ends
+with one summary line of page, asset and byte counts and the elapsed time.
+
+    QUIET: only the summary and errors
+    NORMAL: also removed files and other notable messages (the default)
+    VERBOSE: also a line for every page rendered and file copied
+
+With json_lines=True every line is a JSON object with an "event" key, for CI tooling.
+
+Worker processes never need to log: they return their results to the parent, which reports them.
+If a log is used in a process other than the one that created it (a forked worker, say), it writes
+straight through instead of buffering, so lines are neither lost nor duplicated.
+"""
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+
+
+QUIET = 0
+NORMAL = 1
+VERBOSE = 2
+LEVELS = {"quiet": QUIET, "normal": NORMAL, "verbose": VERBOSE}
+
+# Buffered lines are written out once there are this many
+BUFFER_LINES = 512
+
+
+class BuildLog:
+    """
+    Buffered, leveled log of a build, which also keeps its counts
+        level: QUIET, NORMAL or VERBOSE
+        json_lines: write JSON objects instead of text lines
+        stream: file object written to; None means whatever sys.stdout is at the time
+        pages, written, unchanged: pages rendered, pages whose output changed, pages skipped
+        assets: files copied
+        bytes: bytes of pages and assets written
+        removed: outputs deleted because their source is gone
+        errors: errors reported
+    """
+
+    def __init__(self, level=NORMAL, json_lines=False, stream=None):
+        self.level = level
+        self.json_lines = json_lines
+        self.stream = stream
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.lines = []
+        self.reset()
+
+    def __repr__(self):
+        return f"BuildLog(level={self.level}, json_lines={self.json_lines}, {self.counts()})"
+
+    def reset(self):
+        """Zeroes the counts and restarts the clock for a new build"""
+        self.started = time.perf_counter()
+        self.pages = self.written = self.unchanged = 0
+        self.assets = self.bytes = self.removed = self.errors = 0
+
+    def counts(self):
+        return {
+            "pages": self.pages,
+            "written": self.written,
+            "unchanged": self.unchanged,
+            "assets": self.assets,
+            "bytes": self.bytes,
+            "removed": self.removed,
+            "errors": self.errors,
+        }
+
+    def emit(self, level, event, text, **fields):
+        if level > self.level:
+            return
+        if self.json_lines:
+            line = json.dumps({"event": event, **fields}, separators=(",", ":"))
+        else:
+            line = text
+        with self.lock:
+            if os.getpid() != self.pid:
+                # A forked copy: the buffer belongs to the parent, so write this line on its own
+                self.output().write(line + "\n")
+                return
+            self.lines.append(line)
+            if len(self.lines) >= BUFFER_LINES:
+                self.write_lines()
+
+    def page(self, source, dest, template, written, size=0):
+        self.pages += 1
+        if written:
+            self.written += 1
+            self.bytes += size
+        text = f"Generating page from {source} to {dest} using {template}"
+        self.emit(VERBOSE, "page", text, source=source, dest=dest, written=written, bytes=size)
+
+    def unchanged_pages(self, count):
+        self.unchanged += count
+
+    def asset(self, source, dest, size=0):
+        self.assets += 1
+        self.bytes += size
+        text = f"source file={source} --> dest file={dest}"
+        self.emit(VERBOSE, "asset", text, source=source, dest=dest, bytes=size)
+
+    def remove(self, path):
+        self.removed += 1
+        text = f"Removing {path}: its source no longer exists"
+        self.emit(NORMAL, "removed", text, path=path)
+
+    def info(self, message):
+        self.emit(NORMAL, "info", message, message=message)
+
+    def error(self, message):
+        self.errors += 1
+        self.emit(QUIET, "error", message, message=message)
+
+    def summary(self):
+        """Writes the summary line of the build so far and flushes the log"""
+        seconds = time.perf_counter() - self.started
+        text = (
+            f"Built {self.pages} pages ({self.written} written, {self.unchanged} unchanged), "
+            f"copied {self.assets} assets, wrote {self.bytes:,} bytes"
+        )
+        if self.removed:
+            text += f", removed {self.removed} files"
+        if self.errors:
+            text += f", {self.errors} errors"
+        text += f" in {seconds:.2f} s"
+        self.emit(QUIET, "summary", text, **self.counts(), seconds=round(seconds, 6))
+        self.flush()
+
+    def flush(self):
+        with self.lock:
+            self.write_lines()
+
+    def write_lines(self):
+        if not self.lines or os.getpid() != self.pid:
+            return
+        stream = self.output()
+        stream.write("\n".join(self.lines) + "\n")
+        stream.flush()
+        self.lines = []
+
+    def output(self):
+        return self.stream if self.stream is not None else sys.stdout
+
+
+# The log every build reports to; replaced by configure
+log = BuildLog()
+
+
+def configure(level=NORMAL, json_lines=False, stream=None):
+    """Replaces the shared log (flushing the old one) and returns the new one"""
+    global log
+    log.flush()
+    log = BuildLog(level, json_lines, stream)
+    return log
+
+
+atexit.register(lambda: log.flush())
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from htmlnode import LeafNode, ParentNode
+
+
+# Once the entries add up to more than max_bytes, the least recently used are deleted until they
+# fit in this fraction of it, so a full cache isn't pruned again on every write
+PRUNE_TARGET = 0.9
+
+# An instance checks the size of the cache directory after writing this fraction of max_bytes
+PRUNE_INTERVAL = 1 / 16
+
+# Temporary files older than this were left behind by a writer that died, and are deleted by prune
+STALE_TEMP_SECONDS = 3600
+
+ENTRY_SUFFIX = ".json"
+TEMP_SUFFIX = ".tmp"
+
+
+class DocumentCache:
+    """
+    An on-disk cache of parsed markdown documents, so unchanged sources aren't parsed again when a
+    template change (or a new checkout) forces every page to be re-rendered.
+
+    Each entry is one JSON file holding a compact form of the document's node tree and metadata,
+    named after a hash of the markdown and the parser version: editing a source or bumping
+    PARSER_VERSION simply misses, and stale entries age out. Using an entry touches its mtime, and
+    when the entries outgrow max_bytes the least recently used are deleted.
+
+    Any number of processes (a build's worker pool, a watcher and a build) can share a directory.
+    Entries are written to a temporary file and renamed into place, so a reader sees a whole entry
+    or none; an entry that is missing, unreadable or deleted mid-read is a miss, never an error.
+
+        path: the cache directory, created if needed
+        max_bytes: the total size of entries kept
+        version: mixed into every key; markdown_to_html passes PARSER_VERSION
+        hits, misses, writes, evictions: running counters for this process
+    """
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, version=0):
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1.")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.unpruned_bytes = 0
+        os.makedirs(path, exist_ok=True)
+
+    def __repr__(self):
+        return (
+            f"DocumentCache(path={repr(self.path)}, max_bytes={self.max_bytes}, hits={self.hits}, "
+            f"misses={self.misses}, writes={self.writes}, evictions={self.evictions})"
+        )
+
+    def key(self, markdown):
+        digest = hashlib.sha256(f"{self.version}\0".encode("utf-8"))
+        digest.update(markdown.encode("utf-8"))
+        return digest.hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.path, key + ENTRY_SUFFIX)
+
+    def get(self, key):
+        """
+        Returns the entry stored under key as a dict of "node", "title", "headings" and
+        "word_count", or None (counted as a miss) if there is no usable entry.
+        """
+        entry_path = self.entry_path(key)
+        try:
+            with open(entry_path, "rb") as f:
+                data = json.loads(f.read())
+            entry = {
+                "node": decode_node(data["node"]),
+                "title": data["title"],
+                "headings": [tuple(heading) for heading in data["headings"]],
+                "word_count": data["word_count"],
+            }
+        except (OSError, ValueError, KeyError, TypeError, IndexError):
+            self.misses += 1
+            return None
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        self.hits += 1
+        return entry
+
+    def put(self, key, node, title=None, headings=None, word_count=0):
+        """Stores a document under key, pruning the cache now and then as entries are added"""
+        data = {
+            "node": encode_node(node),
+            "title": title,
+            "headings": headings if headings is not None else [],
+            "word_count": word_count,
+        }
+        content = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        fd, temp_path = tempfile.mkstemp(suffix=TEMP_SUFFIX, dir=self.path)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(temp_path, self.entry_path(key))
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+        self.writes += 1
+        self.unpruned_bytes += len(content)
+        if self.unpruned_bytes >= self.max_bytes * PRUNE_INTERVAL:
+            self.prune()
+
+    def prune(self):
+        """
+        Deletes the least recently used entries if they add up to more than max_bytes, along with
+        stale temporary files, and returns the number of entries deleted.
+        """
+        self.unpruned_bytes = 0
+        entries = []
+        total = 0
+        now = time.time()
+        with os.scandir(self.path) as it:
+            for entry in it:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if entry.name.endswith(ENTRY_SUFFIX):
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                    total += stat.st_size
+                elif entry.name.endswith(TEMP_SUFFIX) and now - stat.st_mtime > STALE_TEMP_SECONDS:
+                    remove_quietly(entry.path)
+
+        removed = 0
+        if total > self.max_bytes:
+            entries.sort()
+            target = self.max_bytes * PRUNE_TARGET
+            for _, size, entry_path in entries:
+                if total <= target:
+                    break
+                remove_quietly(entry_path)
+                total -= size
+                removed += 1
+        self.evictions += removed
+        return removed
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+        }
+
+
+def remove_quietly(file_path):
+    """Removes file_path unless another process already has"""
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
+
+
+def encode_node(node):
+    """
+    Returns a node tree as nested lists that JSON can hold: [tag, value] for a leaf, [tag,
+    [children]] for a parent, with props appended when a node has any
+    """
+    if isinstance(node, ParentNode):
+        data = [node.tag, [encode_node(child) for child in node.children]]
+    else:
+        data = [node.tag, node.value]
+    if node.props:
+        data.append(node.props)
+    return data
+
+
+def decode_node(data):
+    """Rebuilds the node tree that encode_node returned data for"""
+    props = data[2] if len(data) > 2 else None
+    if isinstance(data[1], list):
+        return ParentNode(data[0], [decode_node(child) for child in data[1]], props)
+    return LeafNode(data[0], data[1], props)
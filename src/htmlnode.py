@@ -6,8 +6,12 @@ class HTMLNode:
         children: list of HTMLNode objects representing the children of this node
         props: dict of name value pairs representing HTML attributes
 
+    Nodes use __slots__ rather than a per-instance __dict__, since a large page creates tens of
+    thousands of them.
     """
 
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -34,6 +38,10 @@ class HTMLNode:
         err_msg = f"Child classes will override this method to render themselves as HTML."
         raise NotImplementedError(err_msg)
 
+    def write_html(self, stream):
+        """Writes the HTML for this node to stream (an open text file, io.StringIO, ...)"""
+        stream.write(self.to_html())
+
     def props_to_html(self):
         if self.props:
             html_attrib = ""
@@ -51,6 +59,8 @@ class LeafNode(HTMLNode):
     Value is required (and cannot equal None) and tag is required (although it may equal None)
     """
 
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
@@ -79,6 +89,8 @@ class ParentNode(HTMLNode):
     must be a ParentNode
     """
 
+    __slots__ = ()
+
     def __init__(self, tag, children=None, props=None):
         super().__init__(tag, None, children, props)
 
@@ -89,10 +101,32 @@ class ParentNode(HTMLNode):
         return f"ParentNode({repr(self.tag)}{children_part}{props_part})"
 
     def to_html(self):
-        if not self.tag:
-            raise ValueError("A tag is required for ParentNode objects.")
-        if not self.children:
-            raise ValueError("At least one child attribute is required for ParentNode objects.")
+        parts = []
+        serialize(self, parts.append)
+        return "".join(parts)
 
-        children_html = "".join(child.to_html() for child in self.children)
-        return f"<{self.tag}>{self.props_to_html()}{children_html}</{self.tag}>"
+    def write_html(self, stream):
+        serialize(self, stream.write)
+
+
+def serialize(node, write):
+    """
+    Renders the tree under node by walking it with an explicit stack and handing each HTML fragment
+    to write, in order. The output is only assembled once, by whatever write appends to, and deeply
+    nested trees can't hit the recursion limit.
+    """
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            write(item)
+        elif isinstance(item, ParentNode):
+            if not item.tag:
+                raise ValueError("A tag is required for ParentNode objects.")
+            if not item.children:
+                raise ValueError("At least one child attribute is required for ParentNode objects.")
+            write(f"<{item.tag}>{item.props_to_html()}")
+            stack.append(f"</{item.tag}>")
+            stack.extend(reversed(item.children))
+        else:
+            write(item.to_html())
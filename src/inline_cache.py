@@ -0,0 +1,78 @@
+from collections import OrderedDict
+from htmlnode import LeafNode
+
+
+class InlineCache:
+    """
+    A size-bounded, least-recently-used cache of rendered in-line fragments.
+
+    Keys are the markdown text of a fragment (a paragraph, heading, list item, ...) and values are
+    the (tag, value, props) of the LeafNode objects it renders to. Every get builds new nodes from
+    them, so a page that modifies the nodes it got back can't change what other pages render.
+
+        maxsize: the number of fragments kept before the least recently used one is evicted
+        hits, misses, evictions: running counters used to tune maxsize for a build; a build with
+            --jobs adds the counts of every worker's cache to the parent's (see add_counts)
+    """
+
+    def __init__(self, maxsize=1024):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1.")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return (
+            f"InlineCache(maxsize={self.maxsize}, size={len(self)}, hits={self.hits}, "
+            f"misses={self.misses}, evictions={self.evictions})"
+        )
+
+    def get(self, text):
+        """Returns a new list of the nodes cached for text, or None (counted as a miss)."""
+        leaves = self.entries.get(text)
+        if leaves is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(text)
+        self.hits += 1
+        return [LeafNode(tag, value, copy_props(props)) for tag, value, props in leaves]
+
+    def put(self, text, nodes):
+        """Stores a copy of the LeafNode list nodes, evicting the oldest entry when full."""
+        self.entries[text] = tuple((node.tag, node.value, copy_props(node.props)) for node in nodes)
+        self.entries.move_to_end(text)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        return {"size": len(self), "maxsize": self.maxsize, **self.counts()}
+
+    def counts(self):
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def take_counts(self):
+        """Returns counts() and zeroes the counters, so a worker can hand them to the parent"""
+        counts = self.counts()
+        self.hits = self.misses = self.evictions = 0
+        return counts
+
+    def add_counts(self, counts):
+        """Adds the counts a worker process took with take_counts to this cache's counters"""
+        self.hits += counts["hits"]
+        self.misses += counts["misses"]
+        self.evictions += counts["evictions"]
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+
+def copy_props(props):
+    return dict(props) if props else props
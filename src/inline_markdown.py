@@ -1,79 +1,51 @@
-import re
+import patterns
 from textnode import *
 
 
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     """
     Takes a list of TextNode objects, an in-line delimiter, and a text_type, and returns a new list
-    of TextNode objects, parsing in-line markdown elements into a separate TextNode. If the
-    text_type is not TextType.text, then the function returns the list of nodes unaltered.
+    of TextNode objects, parsing in-line markdown elements into a separate TextNode. Nodes whose
+    text_type is not TextType.TEXT are passed through unaltered.
     """
     delim = {TextType.BOLD: "**", TextType.ITALIC: "*", TextType.CODE: "`"}
+    if text_type not in delim:
+        raise Exception("Invalid text_type.")
+    if delimiter != delim[text_type]:
+        raise Exception("Delimiter argument does not match the text_type argument.")
+
+    tokens = patterns.DELIMITER_TOKENS[delimiter]
     new_nodes = []
     for node in old_nodes:
-        if text_type not in delim:
-            raise Exception("Invalid text_type.")
-        if delimiter != delim[text_type]:
-
-            raise Exception("Delimiter argument does not match the text_type argument.")
-        if node.text.count(delimiter) % 2 != 0:
-            raise Exception(f"Invalid mardown syntax: no closing delimiter for '{delimiter}'.")
-
         if node.text_type != TextType.TEXT:
             new_nodes.append(node)
-        else:
-            text_builder = ""
-            is_new_type = False
-            i = 0
-            text = node.text
-            while i < len(text):
-                if text_type == TextType.BOLD:
-                    if i < len(text) - 1 and text[i] == "*" and text[i + 1] == "*":
-                        if is_new_type == False:
-                            is_new_type = True
-                            current_type = node.text_type
-                        else:
-                            is_new_type = False
-                            current_type = text_type
-                        if text_builder:
-                            new_nodes.append(TextNode(text_builder, current_type))
-                            text_builder = ""
-                        i += 2
-                    else:
-                        text_builder += text[i]
-                        i += 1
-                else:
-                    if text[i] == delimiter:
-                        if i < len(text) - 1 and text[i] == "*" and text[i + 1] == "*":
-                            text_builder += "**"
-                            i += 1
-                        else:
-                            if text[i] == delimiter:
-                                if is_new_type == False:
-                                    is_new_type = True
-                                    current_type = node.text_type
-                                else:
-                                    is_new_type = False
-                                    current_type = text_type
-                                if text_builder:
-                                    new_nodes.append(TextNode(text_builder, current_type))
-                                    text_builder = ""
-                    else:
-                        text_builder += text[i]
-                    i += 1
-            if text_builder:
-                current_type = text_type if is_new_type else node.text_type
-                new_nodes.append(TextNode(text_builder, current_type))
+            continue
+
+        text = node.text
+        start = 0
+        is_open = False
+        for match in tokens.finditer(text):
+            if match.group() != delimiter:
+                continue
+            if match.start() > start:
+                current_type = text_type if is_open else node.text_type
+                new_nodes.append(TextNode(text[start : match.start()], current_type))
+            is_open = not is_open
+            start = match.end()
+        if is_open:
+            raise Exception(f"Invalid mardown syntax: no closing delimiter for '{delimiter}'.")
+        if start < len(text):
+            new_nodes.append(TextNode(text[start:], node.text_type))
     return new_nodes
 
 
 def extract_markdown_images(text):
-    matches = re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    matches = patterns.IMAGE.findall(text)
     return matches
 
 
 def extract_markdown_links(text):
-    matches = re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    matches = patterns.LINK.findall(text)
     if matches:
         for i, match in enumerate(matches):
             if not match[0]:
@@ -84,50 +56,78 @@ def extract_markdown_links(text):
 def split_nodes_image(old_nodes):
     new_nodes = []
     for node in old_nodes:
-        images = extract_markdown_images(node.text)
-        if not images:
+        text = node.text
+        start = 0
+        for match in patterns.IMAGE.finditer(text):
+            if match.start() > start:
+                new_nodes.append(TextNode(text[start : match.start()], TextType.TEXT))
+            alt_text, url = match.groups()
+            new_nodes.append(TextNode(alt_text, TextType.IMAGE, url=url))
+            start = match.end()
+        if start == 0:
             new_nodes.append(node)
-        else:
-            text = node.text
-            for image_elements in images:
-                image = f"![{image_elements[0]}]({image_elements[1]})"
-                text_chunks = text.split(image, 1)
-                if text_chunks[0]:
-                    new_nodes.append(TextNode(text_chunks[0], TextType.TEXT))
-                new_nodes.append(
-                    TextNode(image_elements[0], TextType.IMAGE, url=image_elements[1])
-                )
-                text = text_chunks[1]
-            if text:
-                new_nodes.append(TextNode(text, TextType.TEXT))
+        elif start < len(text):
+            new_nodes.append(TextNode(text[start:], TextType.TEXT))
     return new_nodes
 
 
 def split_nodes_link(old_nodes):
     new_nodes = []
     for node in old_nodes:
-        links = extract_markdown_links(node.text)
-        if not links:
+        text = node.text
+        start = 0
+        for match in patterns.LINK.finditer(text):
+            if match.start() > start:
+                new_nodes.append(TextNode(text[start : match.start()], TextType.TEXT))
+            link_text, url = match.groups()
+            new_nodes.append(TextNode(link_text or url, TextType.LINK, url=url))
+            start = match.end()
+        if start == 0:
             new_nodes.append(node)
-        else:
-            text = node.text
-            for link_elements in links:
-                link = f"[{link_elements[0]}]({link_elements[1]})"
-                text_chunks = text.split(link, 1)
-                if text_chunks[0]:
-                    new_nodes.append(TextNode(text_chunks[0], TextType.TEXT))
-                new_nodes.append(TextNode(link_elements[0], TextType.LINK, url=link_elements[1]))
-                text = text_chunks[1]
-            if text:
-                new_nodes.append(TextNode(text, TextType.TEXT))
+        elif start < len(text):
+            new_nodes.append(TextNode(text[start:], TextType.TEXT))
     return new_nodes
 
 
+INLINE_DELIMITERS = {"**": TextType.BOLD, "*": TextType.ITALIC, "`": TextType.CODE}
+
+
 def text_to_textnodes(text):
-    markdown_elements = {"bold": "**", "italic": "*", "code": "`"}
-    link_nodes = split_nodes_link([TextNode(text, TextType.TEXT)])
-    image_nodes = split_nodes_image(link_nodes)
-    bold_nodes = split_nodes_delimiter(image_nodes, markdown_elements["bold"], TextType.BOLD)
-    italic_nodes = split_nodes_delimiter(bold_nodes, markdown_elements["italic"], TextType.ITALIC)
-    code_nodes = split_nodes_delimiter(italic_nodes, markdown_elements["code"], TextType.CODE)
-    return code_nodes
+    """
+    Converts a string of in-line markdown into a list of TextNode objects in a single pass.
+
+    Produces the same nodes as running split_nodes_link, split_nodes_image and the three
+    split_nodes_delimiter passes in turn, but walks the text only once. Once a bold, italic or code
+    span is open, everything up to its closing delimiter is taken literally, so a `*` inside a code
+    span no longer counts as an unmatched italic delimiter.
+    """
+    nodes = []
+    start = 0
+    delimiter = None
+    for match in patterns.INLINE_TOKEN.finditer(text):
+        token = match.group()
+        if delimiter is not None:
+            if token != delimiter:
+                continue
+            if match.start() > start:
+                nodes.append(TextNode(text[start : match.start()], INLINE_DELIMITERS[delimiter]))
+            delimiter = None
+            start = match.end()
+            continue
+
+        if match.start() > start:
+            nodes.append(TextNode(text[start : match.start()], TextType.TEXT))
+        start = match.end()
+        if token in INLINE_DELIMITERS:
+            delimiter = token
+        elif match.group(2) is not None:
+            nodes.append(TextNode(match.group(1), TextType.IMAGE, url=match.group(2)))
+        else:
+            link_text, url = match.group(3, 4)
+            nodes.append(TextNode(link_text or url, TextType.LINK, url=url))
+
+    if delimiter is not None:
+        raise Exception(f"Invalid mardown syntax: no closing delimiter for '{delimiter}'.")
+    if start < len(text):
+        nodes.append(TextNode(text[start:], TextType.TEXT))
+    return nodes
@@ -1,9 +1,215 @@
+import argparse
+import buildlog
+import cProfile
+import markdown_to_html
+import preview
 import utils
+import watch
+from manifest import BuildManifest
 
 
-def main():
-    utils.copy_content("static", "public")
-    utils.generate_pages_recursive("content", "template.html", "public")
+MANIFEST_PATH = ".build-manifest.json"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static site from content/ and static/.")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=("build", "watch", "serve"),
+        default="build",
+        help="build the site once (default); build it, serve it with live reload and rebuild "
+        "whatever changes (watch); or serve pages rendered on request, without building (serve)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes used to render pages (0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="write each page block by block instead of building it in memory",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=f"only re-render pages whose source or template changed since the last build "
+        f"(tracked in {MANIFEST_PATH})",
+    )
+    parser.add_argument(
+        "--link",
+        choices=("hard", "reflink"),
+        help="with --incremental, hardlink or reflink static files instead of copying them",
+    )
+    parser.add_argument(
+        "--gzip",
+        type=int,
+        nargs="?",
+        const=9,
+        choices=range(10),
+        metavar="LEVEL",
+        help="write a precompressed .gz sidecar next to every page and compressible static file, "
+        "at the given zlib level (default 9)",
+    )
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument(
+        "-q",
+        "--quiet",
+        dest="log_level",
+        action="store_const",
+        const="quiet",
+        default="normal",
+        help="only print the build summary and errors",
+    )
+    verbosity.add_argument(
+        "-v",
+        "--verbose",
+        dest="log_level",
+        action="store_const",
+        const="verbose",
+        help="print a line for every page rendered and file copied",
+    )
+    parser.add_argument(
+        "--log-json",
+        action="store_true",
+        help="write the build log as JSON lines, one object per event",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="time every phase of every page and print totals, percentiles and the slowest pages",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        metavar="N",
+        help="with --profile, the number of slowest pages listed (default 10)",
+    )
+    parser.add_argument(
+        "--profile-stats",
+        metavar="FILE",
+        help="run the build under cProfile and dump the stats to FILE (.pstats); implies "
+        "--profile; only the main process is covered, so use it with --jobs 1",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        metavar="DIR",
+        help="keep parsed documents in DIR and reuse them for sources that haven't changed, even "
+        "when the template has; the directory can be shared by builds, watchers and workers",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=64,
+        metavar="MB",
+        help="with --cache-dir, the size the cache is kept under (default 64)",
+    )
+    parser.add_argument(
+        "--inline-cache",
+        type=int,
+        metavar="ENTRIES",
+        help="remember the rendered in-line markdown of the ENTRIES most recently used fragments "
+        "(bylines, nav links, footers, ...) and log the cache's hits, misses and evictions after "
+        "the build; each worker under --jobs keeps a cache of this size",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8888,
+        help="with watch or serve, the port the site is served on",
+    )
+    parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="with --incremental, compare static file contents rather than trusting mtimes",
+    )
+    args = parser.parse_args(argv)
+    if args.inline_cache is not None and args.inline_cache < 1:
+        parser.error("--inline-cache must be at least 1")
+    if args.profile_stats:
+        args.profile = True
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    log = buildlog.configure(buildlog.LEVELS[args.log_level], json_lines=args.log_json)
+    if args.cache_dir:
+        markdown_to_html.enable_document_cache(args.cache_dir, args.cache_size * 1024 * 1024)
+    if args.inline_cache:
+        markdown_to_html.enable_inline_cache(args.inline_cache)
+    if args.command == "watch":
+        watch.watch(manifest_path=MANIFEST_PATH, port=args.port, gzip_level=args.gzip)
+        return
+    if args.command == "serve":
+        preview.serve(port=args.port)
+        return
+    build_profile = None
+    if args.profile:
+        page_profiler = utils.enable_profiling()
+        if args.profile_stats:
+            build_profile = cProfile.Profile()
+            build_profile.enable()
+    manifest = None
+    # Static files that need a .gz sidecar, compressed by the page jobs
+    compress = []
+    if args.incremental:
+        manifest = BuildManifest.load(MANIFEST_PATH)
+        utils.sync_content(
+            "static",
+            "public",
+            manifest=manifest,
+            checksum=args.checksum,
+            link=args.link,
+            gzip_level=args.gzip,
+            compress=compress,
+        )
+    else:
+        utils.copy_content("static", "public", gzip_level=args.gzip, compress=compress)
+    utils.generate_pages_recursive(
+        "content",
+        "template.html",
+        "public",
+        stream=args.stream,
+        jobs=args.jobs,
+        manifest=manifest,
+        gzip_level=args.gzip,
+        compress=compress,
+    )
+    if args.profile:
+        if build_profile is not None:
+            build_profile.disable()
+            build_profile.dump_stats(args.profile_stats)
+        log.emit(
+            buildlog.QUIET,
+            "profile",
+            page_profiler.report(args.profile_top),
+            phases=page_profiler.phase_stats(),
+            slowest=[
+                {"source": source_path, "total": total, "phases": timings}
+                for total, source_path, timings in page_profiler.slowest(args.profile_top)
+            ],
+        )
+    inline_cache = markdown_to_html.inline_cache
+    if inline_cache is not None:
+        counts = inline_cache.counts()
+        lookups = counts["hits"] + counts["misses"]
+        log.emit(
+            buildlog.QUIET,
+            "inline_cache",
+            f"Inline cache: {counts['hits']} hits, {counts['misses']} misses "
+            f"({counts['hits'] / max(lookups, 1):.0%} hit rate), {counts['evictions']} evictions, "
+            f"{inline_cache.maxsize} entries per process",
+            **counts,
+            maxsize=inline_cache.maxsize,
+        )
+    if markdown_to_html.document_cache is not None:
+        markdown_to_html.document_cache.prune()
+    log.summary()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+
+
+def hash_file(file_path):
+    with open(file_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class BuildManifest:
+    """
+    On-disk record of the last build, used to skip pages whose inputs haven't changed
+        path: str path of the JSON file the manifest is loaded from and saved to
+        template_hash: str hash of the template every recorded page was rendered with
+        parser_version: int markdown_to_html.PARSER_VERSION the pages were rendered with
+        pages: dict mapping each markdown source path to {"size", "mtime_ns", "hash", "output"}
+        assets: dict mapping each static file copied into the output to the source it came from
+        gzip_level: the level .gz sidecars were written at (None if they weren't), so a build at
+            another level knows to rewrite them
+
+    A page is up to date when the template and parser are unchanged, its output still exists, and
+    its source has the recorded size and mtime. If only the mtime moved (a touch, a fresh checkout)
+    the source is hashed and compared with the recorded hash instead.
+    """
+
+    def __init__(
+        self,
+        path,
+        template_hash=None,
+        parser_version=None,
+        pages=None,
+        assets=None,
+        gzip_level=None,
+    ):
+        self.path = path
+        self.template_hash = template_hash
+        self.parser_version = parser_version
+        self.pages = pages if pages is not None else {}
+        self.assets = assets if assets is not None else {}
+        self.gzip_level = gzip_level
+
+    def __repr__(self):
+        return (
+            f"BuildManifest(path={repr(self.path)}, pages={len(self.pages)}, "
+            f"assets={len(self.assets)})"
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Loads the manifest at path, or returns an empty one if it is missing or unreadable."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(
+                path,
+                data["template_hash"],
+                data["parser_version"],
+                data["pages"],
+                data.get("assets"),
+                data.get("gzip_level"),
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            return cls(path)
+
+    def save(self):
+        data = {
+            "template_hash": self.template_hash,
+            "parser_version": self.parser_version,
+            "pages": self.pages,
+            "assets": self.assets,
+            "gzip_level": self.gzip_level,
+        }
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(temp_path, self.path)
+
+    def start_build(self, template_hash, parser_version):
+        """
+        Sets the template and parser for this build. If either changed, every recorded page is
+        forgotten so that the whole site is re-rendered.
+        """
+        if template_hash != self.template_hash or parser_version != self.parser_version:
+            self.pages = {}
+        self.template_hash = template_hash
+        self.parser_version = parser_version
+
+    def is_fresh(self, source_path, output_path):
+        entry = self.pages.get(source_path)
+        if entry is None or entry["output"] != output_path:
+            return False
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            return False
+        if not os.path.exists(output_path):
+            return False
+        if stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]:
+            return True
+        if stat.st_size != entry["size"] or hash_file(source_path) != entry["hash"]:
+            return False
+        entry["mtime_ns"] = stat.st_mtime_ns
+        return True
+
+    def record(self, source_path, output_path, source_info):
+        """
+        Records that output_path was rendered from source_path as described by source_info, the
+        size, mtime_ns and hash of the bytes that were actually read (see utils.read_source)
+        """
+        self.pages[source_path] = {
+            "size": source_info["size"],
+            "mtime_ns": source_info["mtime_ns"],
+            "hash": source_info["hash"],
+            "output": output_path,
+        }
+
+    def remove_missing(self, source_paths):
+        """
+        Deletes the outputs of recorded pages whose sources are not in source_paths any more (along
+        with their .gz sidecars), and returns the list of outputs that were removed.
+        """
+        removed = []
+        for source_path in list(self.pages):
+            if source_path in source_paths:
+                continue
+            output_path = self.pages.pop(source_path)["output"]
+            if os.path.exists(output_path):
+                os.remove(output_path)
+                removed.append(output_path)
+            if os.path.exists(f"{output_path}.gz"):
+                os.remove(f"{output_path}.gz")
+        return removed
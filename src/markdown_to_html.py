@@ -1,6 +1,8 @@
 from enum import Enum, auto
-import re
+import patterns
+from document_cache import DocumentCache
 from htmlnode import ParentNode, HTMLNode
+from inline_cache import InlineCache
 from inline_markdown import text_to_textnodes
 from textnode import text_node_to_html_node
 
@@ -9,6 +11,39 @@ class HeaderNotFoundException(Exception):
     pass
 
 
+class Document:
+    """
+    A rendered markdown document together with the metadata collected while rendering it
+        node: ParentNode("div") holding one child node per block
+        title: str text of the first h1 header, or None if the document has none
+        headings: list of (tag, text) tuples for every header, in document order
+        word_count: int number of whitespace-separated words in the rendered text
+    """
+
+    def __init__(self, node, title=None, headings=None, word_count=0):
+        self.node = node
+        self.title = title
+        self.headings = headings if headings is not None else []
+        self.word_count = word_count
+
+    def __repr__(self):
+        return (
+            f"Document(title={repr(self.title)}, headings={self.headings}, "
+            f"word_count={self.word_count})"
+        )
+
+
+# Bump whenever a change to the parser alters the HTML it produces for the same markdown, so that
+# incremental builds know to re-render every page
+PARSER_VERSION = 1
+
+# Opt-in cache of rendered in-line fragments; see enable_inline_cache
+inline_cache = None
+
+# Opt-in on-disk cache of parsed documents; see enable_document_cache
+document_cache = None
+
+
 class BlockType(Enum):
     PARAGRAPH = auto()
     HEADING = auto()
@@ -23,33 +58,97 @@ def markdown_to_blocks(markdown: str):
     return [block for block in raw_blocks if block]
 
 
-def block_to_block_type(block):
-    match = re.match(r"(#+)\s", block)
-    if match and len(match.group(0)) <= 7:
-        return BlockType.HEADING
-
-    if re.match(r"^```([\s\S]*?)```(?=\Z)", block):
-        return BlockType.CODE
+def scan_blocks(markdown):
+    """
+    Reads the markdown document line by line once and yields a (block_type, (start, end)) record
+    for each block, where markdown[start:end] is the same stripped text markdown_to_blocks would
+    return. Blocks are separated by empty lines and classified as soon as their last line is read,
+    without slicing them out of the document.
+    """
+    length = len(markdown)
+    pos = 0
+    block_start = None
+    last_line = None
+    while pos <= length:
+        line_end = markdown.find("\n", pos)
+        if line_end == -1:
+            line_end = length
+
+        if line_end == pos:
+            if block_start is not None:
+                end = patterns.TRAILING_SPACE.search(markdown, *last_line).start()
+                yield classify_block(markdown, block_start, end), (block_start, end)
+                block_start = None
+        else:
+            first = patterns.NON_SPACE.search(markdown, pos, line_end)
+            if first:
+                if block_start is None:
+                    block_start = first.start()
+                last_line = (pos, line_end)
+        pos = line_end + 1
 
-    matches = re.match(r"^(\s*>\s*.*(\n|\Z))+$", block)
-    if matches:
-        return BlockType.QUOTE
+    if block_start is not None:
+        end = patterns.TRAILING_SPACE.search(markdown, *last_line).start()
+        yield classify_block(markdown, block_start, end), (block_start, end)
 
-    matches = re.match(r"^(\s*[*-]\s+.+(\n|\Z))+$", block)
-    if matches:
-        return BlockType.UNORDERED_LIST
 
-    if re.match(r"^(\s*\d+\.\s+.+(\n|\Z))+$", block):
-        numbers = re.findall(r"^\s*(\d+)\.", block, re.MULTILINE)
-        numbers = [int(num) for num in numbers]
-        if numbers == list(range(1, len(numbers) + 1)):
+def classify_block(markdown, start, end):
+    """
+    Returns the BlockType of markdown[start:end]. Each block type begins with its own marker
+    character, so the first significant character picks the single pattern that needs checking.
+    """
+    first = markdown[start] if start < end else ""
+    if first == "#":
+        match = patterns.HEADING.match(markdown, start, end)
+        if match and match.end() - start <= 7:
+            return BlockType.HEADING
+        return BlockType.PARAGRAPH
+    if first == "`":
+        if patterns.CODE_BLOCK.match(markdown, start, end):
+            return BlockType.CODE
+        return BlockType.PARAGRAPH
+
+    significant = patterns.NON_SPACE.search(markdown, start, end)
+    if not significant:
+        return BlockType.PARAGRAPH
+    first = significant.group()
+    if first == ">":
+        if patterns.QUOTE_BLOCK.match(markdown, start, end):
+            return BlockType.QUOTE
+    elif first == "*" or first == "-":
+        if patterns.UNORDERED_LIST_BLOCK.match(markdown, start, end):
+            return BlockType.UNORDERED_LIST
+    elif first.isdigit():
+        if patterns.ORDERED_LIST_BLOCK.match(markdown, start, end) and is_numbered_from_one(
+            markdown, start, end
+        ):
             return BlockType.ORDERED_LIST
-
     return BlockType.PARAGRAPH
 
 
+def is_numbered_from_one(markdown, start, end):
+    """Checks that the list items in markdown[start:end] are numbered 1, 2, 3, ... in order."""
+    expected = 1
+    line_start = start
+    while line_start <= end:
+        line_end = markdown.find("\n", line_start, end)
+        if line_end == -1:
+            line_end = end
+        match = patterns.ORDERED_LIST_LINE_NUMBER.match(markdown, line_start, line_end)
+        if match:
+            if int(match.group(1)) != expected:
+                return False
+            expected += 1
+        line_start = line_end + 1
+    return True
+
+
+def block_to_block_type(block):
+    return classify_block(block, 0, len(block))
+
+
 def get_heading_level(block):
-    match = re.match(r"(#+)\s(.+?)\s*$", block)
+    match = patterns.HEADING_TEXT.match(block)
     if match:
         hashes, header_text = match.groups()
         if not header_text.strip():
@@ -66,9 +165,11 @@ def parse_markdown_list_items(block_type, block):
         raise ValueError("BlockType must be ORDERED_LIST or UNORDERED_LIST.")
     list_items = []
     pattern = (
-        r"^\s*[*-]\s+(.+)$" if block_type == BlockType.UNORDERED_LIST else r"^\s*[0-9]+\.\s+(.+)$"
+        patterns.UNORDERED_LIST_ITEM
+        if block_type == BlockType.UNORDERED_LIST
+        else patterns.ORDERED_LIST_ITEM
     )
-    match = re.finditer(pattern, block, re.MULTILINE)
+    match = pattern.finditer(block)
     for m in match:
         text = m.group(1)
         children = text_to_children(text)
@@ -76,14 +177,53 @@ def parse_markdown_list_items(block_type, block):
     return list_items
 
 
+def enable_inline_cache(maxsize=1024):
+    """
+    Turns on memoization of text_to_children for repeated in-line fragments (bylines, nav links,
+    footers, ...) and returns the InlineCache so its hit/miss/eviction counters can be inspected.
+    """
+    global inline_cache
+    inline_cache = InlineCache(maxsize)
+    return inline_cache
+
+
+def disable_inline_cache():
+    global inline_cache
+    inline_cache = None
+
+
+def enable_document_cache(path, max_bytes=64 * 1024 * 1024):
+    """
+    Turns on the on-disk cache of parsed documents in the directory path, so markdown_to_document
+    and markdown_to_html_node load documents parsed by earlier builds instead of parsing them, and
+    returns the DocumentCache.
+    """
+    global document_cache
+    document_cache = DocumentCache(path, max_bytes, version=PARSER_VERSION)
+    return document_cache
+
+
+def disable_document_cache():
+    global document_cache
+    document_cache = None
+
+
 def text_to_children(text):
+    if inline_cache is not None:
+        cached = inline_cache.get(text)
+        if cached is not None:
+            return cached
+
     text_nodes = text_to_textnodes(text)
     children = [text_node_to_html_node(child) for child in text_nodes]
+    if inline_cache is not None:
+        inline_cache.put(text, children)
     return children
 
 
-def block_to_node(block):
-    block_type = block_to_block_type(block)
+def block_to_node(block, block_type=None):
+    if block_type is None:
+        block_type = block_to_block_type(block)
     if block_type == BlockType.PARAGRAPH:
         children = text_to_children(block)
         node = ParentNode(tag="p", children=children)
@@ -94,7 +234,7 @@ def block_to_node(block):
         node = ParentNode(tag=header, children=children)
         return node
     if block_type == BlockType.CODE:
-        match = re.match(r"^```([\s\S]*?)```(?=\Z)", block)
+        match = patterns.CODE_BLOCK.match(block)
         if match:
             code_text = match.groups()[0].strip()
         else:
@@ -104,7 +244,7 @@ def block_to_node(block):
         node = ParentNode(tag="pre", children=code_child)
         return node
     if block_type == BlockType.QUOTE:
-        lines = re.findall(r"^\s*>\s*(.*)", block, re.MULTILINE)
+        lines = patterns.QUOTE_LINE.findall(block)
         text = "\n".join(lines)
         children = text_to_children(text)
         node = ParentNode(tag="blockquote", children=children)
@@ -120,14 +260,148 @@ def block_to_node(block):
 
 
 def markdown_to_html_node(markdown):
+    if document_cache is not None:
+        return markdown_to_document(markdown).node
     node_list = []
-    blocks = markdown_to_blocks(markdown)
-    for block in blocks:
-        node = block_to_node(block)
+    for block_type, (start, end) in scan_blocks(markdown):
+        node = block_to_node(markdown[start:end], block_type)
         node_list.append(node)
     return ParentNode(tag="div", children=node_list)
 
 
+def markdown_to_document(markdown):
+    """
+    Builds the HTML tree and collects the document metadata (title, headings and word count) in the
+    same pass over the blocks, so a page only has to be block-parsed once. With the document cache
+    enabled, a document parsed before is loaded from the cache instead.
+    """
+    if document_cache is None:
+        return parse_document(markdown)
+    key = document_cache.key(markdown)
+    entry = document_cache.get(key)
+    if entry is not None:
+        return Document(**entry)
+    document = parse_document(markdown)
+    document_cache.put(key, document.node, document.title, document.headings, document.word_count)
+    return document
+
+
+def parse_document(markdown):
+    """markdown_to_document without the document cache"""
+    node_list = []
+    headings = []
+    title = None
+    word_count = 0
+    for block_type, (start, end) in scan_blocks(markdown):
+        block = markdown[start:end]
+        node = block_to_node(block, block_type)
+        node_list.append(node)
+        word_count += count_words(node)
+        if block_type == BlockType.HEADING:
+            heading = get_heading_level(block)
+            headings.append(heading)
+            if title is None and heading[0] == "h1":
+                title = heading[1]
+    node = ParentNode(tag="div", children=node_list)
+    return Document(node, title=title, headings=headings, word_count=word_count)
+
+
+def markdown_to_html_incremental(markdown, block_cache, key):
+    """
+    Returns (html, title): the same as markdown_to_html_node(markdown).to_html() and the document
+    title, but reusing the fragments block_cache kept from the last render of the document key.
+    Only blocks whose text isn't among them go through block_to_node and to_html.
+    """
+    previous = block_cache.fragments(key)
+    fragments = {}
+    parts = ["<div>"]
+    title = None
+    for block_type, (start, end) in scan_blocks(markdown):
+        block = markdown[start:end]
+        fragment = previous.get(block) or fragments.get(block)
+        if fragment is None:
+            heading = get_heading_level(block) if block_type == BlockType.HEADING else None
+            fragment = (block_to_node(block, block_type).to_html(), heading)
+            block_cache.misses += 1
+        else:
+            block_cache.hits += 1
+        fragments[block] = fragment
+        parts.append(fragment[0])
+        heading = fragment[1]
+        if title is None and heading is not None and heading[0] == "h1":
+            title = heading[1]
+    if not fragments:
+        raise ValueError("At least one child attribute is required for ParentNode objects.")
+    parts.append("</div>")
+    block_cache.replace(key, fragments)
+    return "".join(parts), title
+
+
+def count_words(node):
+    """
+    Counts the words in the text of node. The leaf values under each parent are joined before
+    splitting, so "**bold**ly" counts as one word while separate list items never run together.
+    """
+    word_count = 0
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if not current.children:
+            continue
+        text = "".join(child.value for child in current.children if child.value)
+        word_count += len(text.split())
+        stack.extend(child for child in current.children if child.children)
+    return word_count
+
+
+def read_blocks(lines):
+    """
+    Groups an iterable of lines (such as an open markdown file) into the same stripped blocks that
+    markdown_to_blocks returns, holding only the current block in memory.
+    """
+    buffer = []
+    for line in lines:
+        if line == "\n":
+            block = "".join(buffer).strip()
+            buffer.clear()
+            if block:
+                yield block
+        else:
+            buffer.append(line)
+    block = "".join(buffer).strip()
+    if block:
+        yield block
+
+
+def iter_markdown_html(lines):
+    """
+    Streaming form of markdown_to_html_node(markdown).to_html(): reads blocks from an iterable of
+    lines and yields the HTML one block at a time, so the output can be written as it is produced.
+    """
+    blocks = read_blocks(lines)
+    first_block = next(blocks, None)
+    if first_block is None:
+        raise ValueError("At least one child attribute is required for ParentNode objects.")
+    yield "<div>"
+    yield block_to_node(first_block).to_html()
+    for block in blocks:
+        yield block_to_node(block).to_html()
+    yield "</div>"
+
+
+def extract_title_from_lines(lines):
+    """
+    Same as extract_title, but reads blocks from an iterable of lines and stops at the first h1
+    header instead of holding the whole document in memory.
+    """
+    for block in read_blocks(lines):
+        if block_to_block_type(block) == BlockType.HEADING:
+            heading_level, heading_text = get_heading_level(block)
+            if heading_level == "h1":
+                return heading_text
+    raise HeaderNotFoundException("No H1 header found in markdown content")
+
+
 def extract_title(markdown):
     """
     Pulls the h1 header from the markdown file (the line that starts with a single #) and returns
@@ -136,10 +410,9 @@ def extract_title(markdown):
     Although not explicitly stated in the project requirements, the function assumes that only the
     first h1 header encountered will be returned.
     """
-    blocks = markdown_to_blocks(markdown)
-    for block in blocks:
-        if block_to_block_type(block) == BlockType.HEADING:
-            heading_level, heading_text = get_heading_level(block)
+    for block_type, (start, end) in scan_blocks(markdown):
+        if block_type == BlockType.HEADING:
+            heading_level, heading_text = get_heading_level(markdown[start:end])
             if heading_level == "h1":
                 return heading_text
     raise HeaderNotFoundException("No H1 header found in markdown content")
@@ -0,0 +1,43 @@
+"""
+Compiled regular expressions shared by markdown_to_html and inline_markdown.
+
+Compiling once at import time lets the hot parsing functions call the bound match/finditer
+methods directly instead of looking each pattern string up in the re module cache on every call.
+Block patterns are used with .match(), which is already anchored at the start of the block, so
+they carry no leading "^".
+"""
+
+import re
+
+
+# ----- Block-level patterns ----- #
+HEADING = re.compile(r"(#+)\s")
+HEADING_TEXT = re.compile(r"(#+)\s(.+?)\s*$")
+CODE_BLOCK = re.compile(r"```([\s\S]*?)```(?=\Z)")
+QUOTE_BLOCK = re.compile(r"(\s*>\s*.*(\n|\Z))+$")
+QUOTE_LINE = re.compile(r"^\s*>\s*(.*)", re.MULTILINE)
+UNORDERED_LIST_BLOCK = re.compile(r"(\s*[*-]\s+.+(\n|\Z))+$")
+UNORDERED_LIST_ITEM = re.compile(r"^\s*[*-]\s+(.+)$", re.MULTILINE)
+ORDERED_LIST_BLOCK = re.compile(r"(\s*\d+\.\s+.+(\n|\Z))+$")
+ORDERED_LIST_ITEM = re.compile(r"^\s*[0-9]+\.\s+(.+)$", re.MULTILINE)
+ORDERED_LIST_LINE_NUMBER = re.compile(r"\s*(\d+)\.")
+
+# Used by the block scanner to strip blocks without slicing them out of the document
+NON_SPACE = re.compile(r"\S")
+TRAILING_SPACE = re.compile(r"\s*\Z")
+
+# ----- In-line patterns ----- #
+IMAGE = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
+# Delimiter tokens for split_nodes_delimiter. Italic also matches "**" so that a bold delimiter is
+# skipped over as literal text instead of being read as two italic delimiters.
+DELIMITER_TOKENS = {
+    "**": re.compile(r"\*\*"),
+    "*": re.compile(r"\*\*|\*"),
+    "`": re.compile(r"`"),
+}
+
+# Single left-to-right scanner used by text_to_textnodes. Images and links are matched whole;
+# "**", "*" and "`" open a span that runs until the same delimiter closes it.
+INLINE_TOKEN = re.compile(rf"{IMAGE.pattern}|{LINK.pattern}|\*\*|\*|`")
@@ -0,0 +1,300 @@
+import buildlog
+import gzip
+import hashlib
+import mimetypes
+import os
+import posixpath
+import threading
+from collections import OrderedDict
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+from template import Template
+from utils import get_file, render_markdown_page
+
+
+# Responses smaller than this aren't worth the gzip header overhead
+GZIP_MIN_SIZE = 256
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+# Total size of the responses kept in memory before the least recently used are dropped
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+class Response:
+    """
+    A rendered page or static file held in memory, with the validators it was built from
+        mtime_ns: mtime of the source file the body came from
+        template_hash: hash of the template a page was rendered with (None for static files)
+        body: the response bytes
+        gzip_body: the gzip-compressed body, or None if the content type isn't worth compressing
+        etag: weak ETag computed from body (weak because the gzip and plain bodies share it)
+    """
+
+    __slots__ = ("mtime_ns", "template_hash", "content_type", "body", "gzip_body", "etag")
+
+    def __init__(self, mtime_ns, template_hash, content_type, body):
+        self.mtime_ns = mtime_ns
+        self.template_hash = template_hash
+        self.content_type = content_type
+        self.body = body
+        self.gzip_body = None
+        if len(body) >= GZIP_MIN_SIZE and content_type.startswith(COMPRESSIBLE_TYPES):
+            # mtime=0 keeps the compressed bytes (and so any cache in front of us) deterministic
+            self.gzip_body = gzip.compress(body, mtime=0)
+        self.etag = f'W/"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+    def __repr__(self):
+        return f"Response({self.content_type}, {len(self.body)} bytes, etag={self.etag})"
+
+    def size(self):
+        """Bytes held by the bodies, which is what the response cache is bounded by"""
+        return len(self.body) + (len(self.gzip_body) if self.gzip_body is not None else 0)
+
+
+class PreviewSite:
+    """
+    Serves the site straight from its sources, without writing public/:
+        /             -> content/index.md, rendered
+        /blog/        -> content/blog/index.md, rendered
+        /blog/post    -> content/blog/post.md, rendered (so does /blog/post.html)
+        /index.css    -> static/index.css, or a non-markdown file under content/
+
+    A directory with an index.md requested without its trailing slash (/blog) is redirected to
+    the slash form (see redirect), as http.server does, so relative links on the page resolve.
+
+    Each response is cached in memory and reused until its source mtime or the template changes.
+    The cache holds at most max_cache_bytes of response bodies, dropping the least recently used.
+    The template is re-read when its own mtime changes, so edits show up on the next request.
+    """
+
+    def __init__(
+        self,
+        content_dir="content",
+        static_dir="static",
+        template_path="template.html",
+        max_cache_bytes=CACHE_MAX_BYTES,
+    ):
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.template = None
+        self.template_mtime_ns = None
+        self.max_cache_bytes = max_cache_bytes
+        self.cache = OrderedDict()
+        self.cache_bytes = 0
+        self.lock = threading.Lock()
+        self.cache_lock = threading.Lock()
+
+    def current_template(self):
+        mtime_ns = os.stat(self.template_path).st_mtime_ns
+        if mtime_ns != self.template_mtime_ns:
+            with self.lock:
+                if mtime_ns != self.template_mtime_ns:
+                    self.template = Template.from_file(self.template_path)
+                    self.template_mtime_ns = mtime_ns
+        return self.template
+
+    def resolve(self, url_path):
+        """
+        Maps a URL path to the file that serves it.
+
+        Returns:
+            tuple: (file path, is_page), or (None, False) when nothing matches
+        """
+        raw_path = unquote(urlsplit(url_path).path)
+        path = posixpath.normpath(raw_path)
+        if raw_path.endswith("/"):
+            path = posixpath.join(path, "index")
+        relative_path = path.lstrip("/")
+        if relative_path.startswith(".."):
+            return None, False
+
+        page_name = relative_path[:-5] if relative_path.endswith(".html") else relative_path
+        page_path = os.path.join(self.content_dir, page_name + ".md")
+        if os.path.isfile(page_path):
+            return page_path, True
+        for source_dir in (self.static_dir, self.content_dir):
+            file_path = os.path.join(source_dir, relative_path)
+            if os.path.isfile(file_path) and not file_path.endswith(".md"):
+                return file_path, False
+        return None, False
+
+    def redirect(self, url_path):
+        """
+        Returns the URL with a trailing slash added if url_path names a content directory that
+        has an index.md, or None
+        """
+        parts = urlsplit(url_path)
+        raw_path = unquote(parts.path)
+        if raw_path.endswith("/"):
+            return None
+        relative_path = posixpath.normpath(raw_path).lstrip("/")
+        if relative_path.startswith(".."):
+            return None
+        if os.path.isfile(os.path.join(self.content_dir, relative_path, "index.md")):
+            return parts._replace(path=parts.path + "/").geturl()
+        return None
+
+    def cached(self, file_path):
+        with self.cache_lock:
+            response = self.cache.get(file_path)
+            if response is not None:
+                self.cache.move_to_end(file_path)
+            return response
+
+    def store(self, file_path, response):
+        """Caches response, dropping the least recently used ones to stay under max_cache_bytes"""
+        with self.cache_lock:
+            old = self.cache.pop(file_path, None)
+            if old is not None:
+                self.cache_bytes -= old.size()
+            if response.size() > self.max_cache_bytes:
+                return
+            self.cache[file_path] = response
+            self.cache_bytes += response.size()
+            while self.cache_bytes > self.max_cache_bytes:
+                _, evicted = self.cache.popitem(last=False)
+                self.cache_bytes -= evicted.size()
+
+    def get(self, url_path):
+        """Returns the Response for url_path, rendering or reading it only if it is out of date"""
+        file_path, is_page = self.resolve(url_path)
+        if file_path is None:
+            return None
+        mtime_ns = os.stat(file_path).st_mtime_ns
+        template = self.current_template() if is_page else None
+        template_hash = template.hash if is_page else None
+
+        response = self.cached(file_path)
+        if (
+            response is not None
+            and response.mtime_ns == mtime_ns
+            and response.template_hash == template_hash
+        ):
+            return response
+        if is_page:
+            body = render_markdown_page(get_file(file_path), template).encode("utf-8")
+            content_type = "text/html; charset=utf-8"
+        else:
+            with open(file_path, "rb") as f:
+                body = f.read()
+            content_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+        response = Response(mtime_ns, template_hash, content_type, body)
+        self.store(file_path, response)
+        return response
+
+
+class PreviewHandler(BaseHTTPRequestHandler):
+    """Answers GET and HEAD from a PreviewSite, with ETag revalidation and gzip encoding"""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this, keep-alive responses stall on
+    # Nagle's algorithm waiting for the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def __init__(self, *args, site=None, **kwargs):
+        self.site = site
+        super().__init__(*args, **kwargs)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.respond(send_body=False)
+
+    def do_GET(self):
+        self.respond(send_body=True)
+
+    def respond(self, send_body):
+        try:
+            response = self.site.get(self.path)
+        except Exception as e:
+            self.send_text(500, f"Failed to render {self.path}: {e}", send_body)
+            return
+        if response is None:
+            location = self.site.redirect(self.path)
+            if location is not None:
+                self.send_response(301)
+                self.send_header("Location", location)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_text(404, f"{self.path} not found", send_body)
+            return
+
+        if_none_match = self.headers.get("If-None-Match", "")
+        if response.etag in if_none_match or if_none_match.strip() == "*":
+            self.send_response(304)
+            self.send_header("ETag", response.etag)
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return
+
+        body = response.body
+        self.send_response(200)
+        self.send_header("Content-Type", response.content_type)
+        if response.gzip_body is not None:
+            self.send_header("Vary", "Accept-Encoding")
+            if accepts_gzip(self.headers.get("Accept-Encoding", "")):
+                body = response.gzip_body
+                self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", response.etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def send_text(self, status, text, send_body):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+
+def accepts_gzip(accept_encoding):
+    """
+    True if an Accept-Encoding header allows gzip: listed with a q-value above 0, or not listed
+    but covered by a * with a q-value above 0
+    """
+    wildcard = False
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding == "gzip":
+            return q > 0
+        if coding == "*":
+            wildcard = q > 0
+    return wildcard
+
+
+def make_server(site, port=8888):
+    handler = partial(PreviewHandler, site=site)
+    server = ThreadingHTTPServer(("", port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(content_dir="content", static_dir="static", template_path="template.html", port=8888):
+    """Serves the site from its sources on the given port until interrupted"""
+    server = make_server(PreviewSite(content_dir, static_dir, template_path), port)
+    buildlog.log.info(f"Previewing {content_dir}/ and {static_dir}/ on port {port}")
+    buildlog.log.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
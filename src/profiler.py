@@ -0,0 +1,90 @@
+"""
+Per-page, per-phase timings for --profile builds.
+
+generate_page times each phase of a page with time.perf_counter_ns while utils.profiler is set,
+around the same render_markdown_page call that unprofiled builds make:
+    read: reading the markdown source
+    parse: markdown_to_document, which builds the node tree and finds the title in one pass
+    to_html: serializing the node tree
+    template: substituting the title and content into the template
+    write: put_file (comparing with the existing output, writing, compressing)
+Pages rendered with a BlockCache (by the watcher) parse and serialize their changed blocks
+together, so all of that time counts as parse.
+Streamed pages can't separate parsing from writing, so they report:
+    title: the pass over the source that finds the title
+    stream: parsing, serializing and writing block by block
+"""
+
+PHASES = ("read", "parse", "to_html", "template", "write", "title", "stream")
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0
+    rank = max(1, -(-p * len(sorted_values) // 100))
+    return sorted_values[rank - 1]
+
+
+class BuildProfiler:
+    """
+    Collects the phase timings of every page in a build
+        pages: list of (source path, {phase: nanoseconds}) in the order pages were reported
+    """
+
+    def __init__(self):
+        self.pages = []
+
+    def __repr__(self):
+        return f"BuildProfiler(pages={len(self.pages)})"
+
+    def record(self, source_path, timings):
+        self.pages.append((source_path, timings))
+
+    def phase_stats(self):
+        """
+        Returns:
+            dict: {phase: {"total", "count", "p50", "p90", "p99", "max"}} in nanoseconds, for each
+            phase that any page reported
+        """
+        stats = {}
+        for phase in PHASES:
+            values = sorted(timings[phase] for _, timings in self.pages if phase in timings)
+            if not values:
+                continue
+            stats[phase] = {"total": sum(values), "count": len(values), "max": values[-1]}
+            for p in PERCENTILES:
+                stats[phase][f"p{p}"] = percentile(values, p)
+        return stats
+
+    def slowest(self, count=10):
+        """Returns the count slowest pages as (total nanoseconds, source path, timings)"""
+        pages = [(sum(timings.values()), source, timings) for source, timings in self.pages]
+        pages.sort(key=lambda page: page[0], reverse=True)
+        return pages[:count]
+
+    def report(self, count=10):
+        """Returns the profile as a text table, followed by the count slowest pages"""
+        stats = self.phase_stats()
+        total = sum(phase["total"] for phase in stats.values())
+        lines = [
+            f"Profile of {len(self.pages)} pages, {total / 1e6:.1f} ms in page phases",
+            f"{'phase':<10}{'total ms':>10}{'share':>8}"
+            + "".join(f"{f'p{p} us':>10}" for p in PERCENTILES)
+            + f"{'max us':>10}",
+        ]
+        for phase, phase_stats in stats.items():
+            share = phase_stats["total"] / total if total else 0
+            lines.append(
+                f"{phase:<10}{phase_stats['total'] / 1e6:>10.1f}{share:>8.0%}"
+                + "".join(f"{phase_stats[f'p{p}'] / 1e3:>10.0f}" for p in PERCENTILES)
+                + f"{phase_stats['max'] / 1e3:>10.0f}"
+            )
+        slowest = self.slowest(count)
+        if slowest:
+            lines.append(f"Slowest {len(slowest)} pages:")
+        for page_total, source_path, timings in slowest:
+            phases = ", ".join(f"{phase} {ns / 1e6:.2f}" for phase, ns in timings.items())
+            lines.append(f"{page_total / 1e6:>10.2f} ms  {source_path}  ({phases})")
+        return "\n".join(lines)
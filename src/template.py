@@ -0,0 +1,89 @@
+import hashlib
+
+
+TITLE_PLACEHOLDER = " {{ Title }} "
+CONTENT_PLACEHOLDER = " {{ Content }}"
+
+# Slot markers in Template.tokens; every other token is a literal string
+TITLE_SLOT = 0
+CONTENT_SLOT = 1
+
+
+class Template:
+    """
+    A page template that is read once per build and compiled into a list of literal segments and
+    placeholder slots, so rendering a page is a single join (or a sequence of writes).
+
+    Rendering produces exactly what the original two-step substitution did:
+        text.replace(TITLE_PLACEHOLDER, title).replace(CONTENT_PLACEHOLDER, content)
+    The only case where the slots alone can't reproduce that is a title which, together with the
+    text around it, spells out a content placeholder; such titles fall back to the substitution.
+
+    Templates hold nothing but strings and ints, so they can be pickled into a worker pool.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        self.tokens = []
+        parts = text.split(TITLE_PLACEHOLDER)
+        for i, part in enumerate(parts):
+            if i:
+                self.tokens.append(TITLE_SLOT)
+            for j, literal in enumerate(part.split(CONTENT_PLACEHOLDER)):
+                if j:
+                    self.tokens.append(CONTENT_SLOT)
+                if literal:
+                    self.tokens.append(literal)
+        self.content_slots = self.tokens.count(CONTENT_SLOT)
+
+        # The text on either side of each title slot that a title could join up with
+        width = len(CONTENT_PLACEHOLDER) - 1
+        self.title_edges = [(left[-width:], right[:width]) for left, right in zip(parts, parts[1:])]
+
+    def __repr__(self):
+        return f"Template(hash={self.hash[:12]}, tokens={len(self.tokens)})"
+
+    @classmethod
+    def from_file(cls, file_path):
+        with open(file_path, encoding="utf-8") as f:
+            return cls(f.read())
+
+    def title_is_safe(self, title):
+        """False if substituting title would create a content placeholder the slots don't know of"""
+        if len(self.title_edges) > 1:
+            # A placeholder could also form across two title slots and the text between them, so
+            # count the placeholders in the substituted text (the placeholder can't overlap itself)
+            substituted = self.text.replace(TITLE_PLACEHOLDER, title)
+            return substituted.count(CONTENT_PLACEHOLDER) == self.content_slots
+        return not any(
+            CONTENT_PLACEHOLDER in left + title + right for left, right in self.title_edges
+        )
+
+    def render(self, title, content):
+        if not self.title_is_safe(title):
+            return self.text.replace(TITLE_PLACEHOLDER, title).replace(CONTENT_PLACEHOLDER, content)
+        return "".join(
+            [
+                title if token == TITLE_SLOT else content if token == CONTENT_SLOT else token
+                for token in self.tokens
+            ]
+        )
+
+    def write(self, stream, title, chunks):
+        """
+        Writes the rendered page to stream, taking the content from an iterable of HTML chunks.
+        With a single content slot the chunks are written as they arrive; otherwise they are joined
+        first.
+        """
+        if self.content_slots != 1 or not self.title_is_safe(title):
+            stream.write(self.render(title, "".join(chunks)))
+            return
+        for token in self.tokens:
+            if token == TITLE_SLOT:
+                stream.write(title)
+            elif token == CONTENT_SLOT:
+                for chunk in chunks:
+                    stream.write(chunk)
+            else:
+                stream.write(token)
@@ -18,6 +18,8 @@ class TextNode:
     Code, Links, Images. Otherwise, Markdown text is considered block-level text.
     """
 
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type
@@ -1,9 +1,27 @@
+import buildlog
+import filecmp
+import gzip
+import hashlib
+import io
 import os
-from shutil import copy, rmtree
-from markdown_to_html import extract_title, markdown_to_html_node
+import markdown_to_html
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from shutil import copy, copy2, copystat, rmtree
+from markdown_to_html import (
+    PARSER_VERSION,
+    HeaderNotFoundException,
+    extract_title_from_lines,
+    iter_markdown_html,
+    markdown_to_document,
+    markdown_to_html_incremental,
+)
+from profiler import BuildProfiler
+from template import Template
 
 
-def copy_content(source, dest):
+def copy_content(source, dest, gzip_level=None, compress=None):
     """
     Removes existing content from 'dest' and recursively copies the file tree structure from
     'source' to 'dest'
@@ -14,6 +32,10 @@ def copy_content(source, dest):
     Args:
         source (string): the path to the source directory
         dest (string): the path to the destination directory
+        gzip_level (int): when set, a .gz sidecar compressed at this level is written next to
+            every compressible file copied
+        compress (list): when given, the files that need a sidecar are appended to it instead,
+            for the caller to compress in the page jobs (see generate_pages_recursive)
 
     Returns:
         None: The function copies files from source to dest; nothing is returned
@@ -21,31 +43,167 @@ def copy_content(source, dest):
     if os.path.exists(dest):
         rmtree(dest)
     os.mkdir(dest)
-    rcopy(source, dest)
+    rcopy(source, dest, gzip_level, compress)
 
 
-def rcopy(source, dest):
+def rcopy(source, dest, gzip_level=None, compress=None):
     """
     Used as a helper function in copy_content to recursively copy files and subdirectories
 
+    The tree is walked iteratively with os.scandir, so each entry's type comes from the directory
+    listing rather than a separate stat call, and deep trees don't hit the recursion limit.
+
     Args:
         source (string): the path to the source directory
         dest (string): the path to the destination directory
+        gzip_level (int): see copy_content
+        compress (list): see copy_content
 
     Returns:
         None: The function copies files from source to dest; nothing is returned
     """
-    if not os.path.exists(dest):
-        os.mkdir(dest)
-    for object in os.listdir(source):
-        source_path = f"{source}/{object}"
-        dest_path = f"{dest}/{object}"
-        if os.path.isfile(source_path):
-            print(f"source file={source_path}", end=" --> ")
-            print(f"dest file={dest_path}")
-            copy(source_path, dest_path)
-        else:
-            rcopy(source_path, dest_path)
+    stack = [(source, dest)]
+    while stack:
+        source_dir, dest_dir = stack.pop()
+        os.makedirs(dest_dir, exist_ok=True)
+        with os.scandir(source_dir) as entries:
+            for entry in entries:
+                source_path = f"{source_dir}/{entry.name}"
+                dest_path = f"{dest_dir}/{entry.name}"
+                if entry.is_file():
+                    copy(source_path, dest_path)
+                    if compress is None:
+                        update_gzip_sidecar(dest_path, gzip_level, True)
+                    elif needs_gzip_sidecar(dest_path, gzip_level, True):
+                        compress.append(dest_path)
+                    buildlog.log.asset(source_path, dest_path, entry.stat().st_size)
+                else:
+                    stack.append((source_path, dest_path))
+
+
+# ioctl request that asks Linux filesystems such as Btrfs and XFS for a copy-on-write clone
+FICLONE = 0x40049409
+
+
+def sync_content(
+    source, dest, manifest=None, checksum=False, link=None, gzip_level=None, compress=None
+):
+    """
+    Brings 'dest' up to date with the files in 'source' without clearing it first, so generated
+    pages and unchanged assets are left alone.
+
+    A file is copied when it is missing from dest or its size or mtime differ from the source.
+    Copies keep the source mtime, so the next sync sees them as unchanged.
+
+    Args:
+        source (string): the path to the source directory
+        dest (string): the path to the destination directory
+        manifest (BuildManifest): when given, files synced on an earlier build whose source has
+            since been deleted are removed from dest, and manifest.assets is updated (the caller
+            saves the manifest)
+        checksum (bool): compare the contents of same-size files as well, instead of trusting a
+            matching mtime; files whose content matches only get their mtime updated
+        link (string): None to copy, "hard" to hardlink or "reflink" to clone files when source and
+            dest share a filesystem; falls back to copying when the link can't be made
+        gzip_level (int): when set, compressible files get a .gz sidecar at this level; only
+            copied files (and unchanged ones whose sidecar is missing) are compressed, unless the
+            manifest records another level, in which case every sidecar is rewritten
+        compress (list): when given, the files that need a sidecar are appended to it instead of
+            being compressed here, for the caller to compress in the page jobs (see
+            generate_pages_recursive)
+
+    Returns:
+        tuple: (copied, unchanged, removed) file counts
+    """
+    copied = unchanged = 0
+    synced = {}
+    pending = [] if compress is None else compress
+    drop_stale_gzip_sidecars(dest, manifest, gzip_level)
+    for dir_path, _, file_names in os.walk(source):
+        # normpath keeps the top-level files' keys free of "./", matching the watcher's
+        dest_dir = os.path.normpath(os.path.join(dest, os.path.relpath(dir_path, source)))
+        os.makedirs(dest_dir, exist_ok=True)
+        for file_name in sorted(file_names):
+            source_path = os.path.join(dir_path, file_name)
+            dest_path = os.path.join(dest_dir, file_name)
+            synced[dest_path] = source_path
+            if file_is_current(source_path, dest_path, checksum):
+                unchanged += 1
+                if needs_gzip_sidecar(dest_path, gzip_level, False):
+                    pending.append(dest_path)
+                continue
+            place_file(source_path, dest_path, link)
+            buildlog.log.asset(source_path, dest_path, os.path.getsize(dest_path))
+            copied += 1
+            if needs_gzip_sidecar(dest_path, gzip_level, True):
+                pending.append(dest_path)
+    if compress is None:
+        for dest_path in pending:
+            write_gzip_sidecar(dest_path, gzip_level)
+
+    removed = 0
+    if manifest is not None:
+        # Manifests written before keys were normalized may still hold "public/./name" keys
+        for dest_path in manifest.assets:
+            if os.path.normpath(dest_path) in synced or not os.path.isfile(dest_path):
+                continue
+            buildlog.log.remove(dest_path)
+            os.remove(dest_path)
+            remove_gzip_sidecar(dest_path)
+            removed += 1
+        manifest.assets = synced
+        manifest.gzip_level = gzip_level
+    return copied, unchanged, removed
+
+
+def file_is_current(source_path, dest_path, checksum=False):
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    source_stat = os.stat(source_path)
+    if source_stat.st_size != dest_stat.st_size:
+        return False
+    if not checksum:
+        return source_stat.st_mtime_ns == dest_stat.st_mtime_ns
+    if not filecmp.cmp(source_path, dest_path, shallow=False):
+        return False
+    if source_stat.st_mtime_ns != dest_stat.st_mtime_ns:
+        copystat(source_path, dest_path)
+    return True
+
+
+def place_file(source_path, dest_path, link=None):
+    """
+    Puts a copy of source_path at dest_path, as a hardlink or reflink if asked to and possible.
+    The file is prepared under a temporary name and moved into place, so dest_path is never
+    half-written.
+    """
+    temp_path = f"{dest_path}.tmp"
+    if link == "hard":
+        try:
+            os.link(source_path, temp_path)
+            os.replace(temp_path, dest_path)
+            return
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    elif link == "reflink":
+        try:
+            import fcntl
+
+            with open(source_path, "rb") as src, open(temp_path, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            copystat(source_path, temp_path)
+            os.replace(temp_path, dest_path)
+            return
+        except (ImportError, OSError):
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    elif link is not None:
+        raise ValueError(f"Unknown link mode: {link}. Use None, 'hard' or 'reflink'.")
+    copy2(source_path, temp_path)
+    os.replace(temp_path, dest_path)
 
 
 def get_file(file_path):
@@ -55,47 +213,584 @@ def get_file(file_path):
         return f.read()
 
 
-def put_file(file_path, content):
-    dir_path, _ = os.path.split(file_path)
-    if not os.path.exists(dir_path):
+def read_source(file_path, source_info=None):
+    """
+    Reads a markdown file as get_file does. Given a source_info dict, the size and mtime_ns of the
+    file (taken from the open file before reading) and the hash of the bytes read are stored in
+    it, so BuildManifest.record describes exactly the version that was rendered.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"{file_path} not found")
+    with open(file_path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        data = f.read()
+    if source_info is not None:
+        source_info["size"] = stat.st_size
+        source_info["mtime_ns"] = stat.st_mtime_ns
+        source_info["hash"] = hashlib.sha256(data).hexdigest()
+    # Decoded with the universal newlines a text-mode read applies
+    return data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
+
+class HashingReader(io.RawIOBase):
+    """A readable binary file that hashes the bytes read through it into digest"""
+
+    def __init__(self, f):
+        self.f = f
+        self.digest = hashlib.sha256()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self.f.readinto(buffer)
+        if count:
+            self.digest.update(memoryview(buffer)[:count])
+        return count
+
+
+def put_file(file_path, content, gzip_level=None):
+    """
+    Writes content to file_path, unless the file already holds exactly that content. Skipping
+    identical writes keeps the mtimes of unchanged outputs, so rsync or a CDN deploy only picks up
+    the files that really changed. Changed files are written under a temporary name and moved into
+    place, so file_path is never half-written.
+
+    With a gzip_level, a compressed .gz sidecar is written alongside for web servers that serve
+    precompressed files. It is only recompressed when the file itself changes (or is missing).
+
+    Returns:
+        bool: True if the file was written, False if it was already up to date
+    """
+    data = content.encode("utf-8")
+    changed = not file_has_content(file_path, data)
+    if changed:
+        dir_path, _ = os.path.split(file_path)
+        if dir_path and not os.path.exists(dir_path):
+            os.makedirs(dir_path)
+        temp_path = f"{file_path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, file_path)
+    update_gzip_sidecar(file_path, gzip_level, changed, data)
+    return changed
+
+
+def file_has_content(file_path, data):
+    """True if file_path exists and holds exactly data (a size check first, then the bytes)"""
+    try:
+        if os.stat(file_path).st_size != len(data):
+            return False
+        with open(file_path, "rb") as f:
+            return f.read() == data
+    except FileNotFoundError:
+        return False
+
+
+# Files with these extensions get a .gz sidecar when a gzip level is set
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".json", ".svg", ".txt", ".xml")
+
+
+def write_gzip_sidecar(file_path, gzip_level, data=None):
+    """
+    Writes file_path + ".gz". The gzip header carries no file name and a zero mtime, so the same
+    content always compresses to the same bytes.
+    """
+    if data is None:
+        with open(file_path, "rb") as f:
+            data = f.read()
+    sidecar_path = f"{file_path}.gz"
+    temp_path = f"{sidecar_path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(gzip.compress(data, compresslevel=gzip_level, mtime=0))
+    os.replace(temp_path, sidecar_path)
+
+
+def remove_gzip_sidecar(file_path):
+    sidecar_path = f"{file_path}.gz"
+    if os.path.exists(sidecar_path):
+        os.remove(sidecar_path)
+
+
+def needs_gzip_sidecar(file_path, gzip_level, changed):
+    """True if file_path should be (re)compressed: it changed, or its sidecar is missing"""
+    if gzip_level is None or not file_path.endswith(COMPRESSIBLE_EXTENSIONS):
+        return False
+    return changed or not os.path.exists(f"{file_path}.gz")
+
+
+def update_gzip_sidecar(file_path, gzip_level, changed, data=None):
+    """
+    Brings the sidecar of file_path up to date after a write. Without a gzip level, the sidecar
+    of a changed file is removed instead, so a stale one is never served.
+    """
+    if needs_gzip_sidecar(file_path, gzip_level, changed):
+        write_gzip_sidecar(file_path, gzip_level, data)
+    elif changed and gzip_level is None:
+        remove_gzip_sidecar(file_path)
+
+
+def drop_stale_gzip_sidecars(dest, manifest, gzip_level):
+    """
+    Removes the sidecars under dest if the manifest says they were written at another gzip level
+    (or with gzip off), so that this build writes them all again at gzip_level.
+    """
+    if manifest is None or manifest.gzip_level == gzip_level:
+        return
+    for dir_path, _, file_names in os.walk(dest):
+        for file_name in file_names:
+            base_name = file_name[: -len(".gz")]
+            if (
+                file_name.endswith(".gz")
+                and base_name.endswith(COMPRESSIBLE_EXTENSIONS)
+                and base_name in file_names
+            ):
+                os.remove(os.path.join(dir_path, file_name))
+
+
+# Collects per-page phase timings while set (see enable_profiling); None costs one check per page
+profiler = None
+
+
+def enable_profiling():
+    global profiler
+    profiler = BuildProfiler()
+    return profiler
+
+
+def disable_profiling():
+    global profiler
+    profiler = None
+
+
+def render_markdown_page(markdown, template, block_cache=None, key=None, timings=None):
+    """
+    Returns the full HTML page for a markdown document, rendered into a compiled Template. Given a
+    BlockCache, only the blocks that changed since the document key was last rendered are rendered.
+    Given a timings dict, the nanoseconds spent in the parse, to_html and template phases are
+    stored in it (with a BlockCache, parsing and serializing the changed blocks count as parse).
+    """
+    clock = time.perf_counter_ns
+    started = clock()
+    if block_cache is not None:
+        html, title = markdown_to_html_incremental(markdown, block_cache, key)
+        parsed = serialized = clock()
+    else:
+        document = markdown_to_document(markdown)
+        parsed = clock()
+        html, title = document.node.to_html(), document.title
+        serialized = clock()
+    if title is None:
+        raise HeaderNotFoundException("No H1 header found in markdown content")
+    page = template.render(str(title), html)
+    if timings is not None:
+        timings["parse"] = parsed - started
+        timings["to_html"] = serialized - parsed
+        timings["template"] = clock() - serialized
+    return page
+
+
+def generate_page(
+    from_path,
+    template_path,
+    dest_path,
+    verbose=True,
+    template=None,
+    gzip_level=None,
+    block_cache=None,
+    source_info=None,
+):
+    """
+    Renders the markdown file at from_path into the page template and writes it to dest_path.
+    Builds pass in the compiled Template so that template_path isn't re-read for every page, and
+    the watcher a BlockCache so that an edit only re-renders the blocks it changed. Given a
+    source_info dict, the size, mtime_ns and hash of the markdown rendered are stored in it (see
+    read_source).
+
+    Returns:
+        bool: True if dest_path changed, False if it already held the rendered page
+    """
+    if template is None:
+        template = Template.from_file(template_path)
+    if profiler is not None:
+        changed = profile_page(
+            from_path, dest_path, template, gzip_level, block_cache, source_info
+        )
+    else:
+        markdown = read_source(from_path, source_info)
+        content = render_markdown_page(markdown, template, block_cache, from_path)
+        changed = put_file(dest_path, content, gzip_level)
+    if verbose:
+        size = os.path.getsize(dest_path) if changed else 0
+        buildlog.log.page(from_path, dest_path, template_path, changed, size)
+    return changed
+
+
+def profile_page(
+    from_path, dest_path, template, gzip_level, block_cache=None, source_info=None
+):
+    """Does the work of generate_page, recording how long each phase takes in profiler"""
+    clock = time.perf_counter_ns
+    started = clock()
+    markdown = read_source(from_path, source_info)
+    timings = {"read": clock() - started}
+    content = render_markdown_page(markdown, template, block_cache, from_path, timings)
+    started = clock()
+    changed = put_file(dest_path, content, gzip_level)
+    timings["write"] = clock() - started
+    profiler.record(from_path, timings)
+    return changed
+
+
+def generate_page_streaming(
+    from_path,
+    template_path,
+    dest_path,
+    verbose=True,
+    template=None,
+    gzip_level=None,
+    source_info=None,
+):
+    """
+    Renders the same page as generate_page, but writes the HTML of each block to dest_path as soon
+    as it is produced, so memory use stays flat no matter how large the markdown file is.
+
+    The source is read twice: once to find the title (which usually sits at the top of the file)
+    and once to render it. Templates with more than one content slot have to hold the whole page.
+
+    The page is streamed into a temporary file, which replaces dest_path only if it differs from
+    it, so like generate_page this returns True only when dest_path changed. The source_info dict
+    is filled as generate_page fills it, from the bytes streamed, unless the file was replaced or
+    modified between the two reads; it is then left empty and the page isn't recorded as built.
+    """
+    if template is None:
+        template = Template.from_file(template_path)
+    started = time.perf_counter_ns() if profiler is not None else 0
+    with open(from_path, encoding="utf-8") as f:
+        title_stat = os.fstat(f.fileno())
+        title = extract_title_from_lines(f)
+    titled = time.perf_counter_ns() if profiler is not None else 0
+
+    dir_path, _ = os.path.split(dest_path)
+    if dir_path and not os.path.exists(dir_path):
         os.makedirs(dir_path)
-    with open(file_path, "w", encoding="utf-8") as f:
-        f.write(content)
-
-
-def generate_page(from_path, template_path, dest_path):
-    md_file = get_file(from_path)
-    template = get_file(template_path)
-    title = extract_title(md_file)
-    html_node = markdown_to_html_node(md_file)
-    html = html_node.to_html()
-    content = template.replace(" {{ Title }} ", str(title))
-    content = content.replace(" {{ Content }}", html)
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-    put_file(dest_path, content)
-
-
-def generate_pages_recursive(dir_path, template_path, dest_dir_path):
-    dir_contents = os.listdir(dir_path)
-    for object in dir_contents:
-        full_path = os.path.join(dir_path, object)
-        if os.path.isfile(full_path):
-            _, ext = os.path.splitext(object)
+    temp_path = f"{dest_path}.tmp"
+    with open(from_path, "rb", buffering=0) as raw, open(temp_path, "w", encoding="utf-8") as f:
+        stat = os.fstat(raw.fileno())
+        reader = HashingReader(raw)
+        source = io.TextIOWrapper(io.BufferedReader(reader), encoding="utf-8")
+        try:
+            template.write(f, str(title), iter_markdown_html(source))
+        except Exception:
+            f.close()
+            os.remove(temp_path)
+            raise
+        source.detach()
+    same_version = (stat.st_ino, stat.st_size, stat.st_mtime_ns) == (
+        title_stat.st_ino,
+        title_stat.st_size,
+        title_stat.st_mtime_ns,
+    )
+    if source_info is not None and same_version:
+        source_info["size"] = stat.st_size
+        source_info["mtime_ns"] = stat.st_mtime_ns
+        source_info["hash"] = reader.digest.hexdigest()
+    changed = not (os.path.exists(dest_path) and filecmp.cmp(temp_path, dest_path, shallow=False))
+    if changed:
+        os.replace(temp_path, dest_path)
+    else:
+        os.remove(temp_path)
+    update_gzip_sidecar(dest_path, gzip_level, changed)
+    if profiler is not None:
+        profiler.record(
+            from_path, {"title": titled - started, "stream": time.perf_counter_ns() - titled}
+        )
+    if verbose:
+        size = os.path.getsize(dest_path) if changed else 0
+        buildlog.log.page(from_path, dest_path, template_path, changed, size)
+    return changed
+
+
+# Kinds of entry yielded by iter_site
+SITE_DIR = "dir"
+SITE_PAGE = "page"
+SITE_FILE = "file"
+# Job kind for writing the sidecar of a file that is already in place (see generate_pages_recursive)
+SITE_GZIP = "gzip"
+
+
+def iter_site(dir_path, dest_dir_path):
+    """
+    Walks dir_path iteratively with os.scandir and yields the work for a build as it is found, in
+    a stable order: the entries of each directory are visited sorted by name, depth first.
+
+    Yields:
+        tuple: (SITE_DIR, destination directory, None) once for every subdirectory, before
+        anything inside it; (SITE_PAGE, markdown path, html path) for markdown files; and
+        (SITE_FILE, source path, destination directory) for every other file
+    """
+    stack = [(iter(sorted_entries(dir_path)), os.path.normpath(dest_dir_path))]
+    while stack:
+        entries, dest_dir = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
+        if entry.is_file():
+            base_name, ext = os.path.splitext(entry.name)
             if ext == ".md":
-                base_name, _ = os.path.splitext(object)
-                dest_file = os.path.join(dest_dir_path, base_name + ".html")
-                generate_page(full_path, template_path, dest_file)
+                yield SITE_PAGE, entry.path, os.path.join(dest_dir, base_name + ".html")
             else:
-                print(f"{object} is not markdown... copying file to {dest_dir_path}")
-                copy(full_path, dest_dir_path)
+                yield SITE_FILE, entry.path, dest_dir
         else:
-            new_dest_dir_path = os.path.join(dest_dir_path, object)
-            if not os.path.exists(new_dest_dir_path):
-                os.makedirs(new_dest_dir_path)
-            generate_pages_recursive(full_path, template_path, new_dest_dir_path)
+            new_dest_dir = os.path.join(dest_dir, entry.name)
+            yield SITE_DIR, new_dest_dir, None
+            stack.append((iter(sorted_entries(entry.path)), new_dest_dir))
+
+
+def sorted_entries(dir_path):
+    with os.scandir(dir_path) as entries:
+        return sorted(entries, key=lambda entry: entry.name)
+
+
+def find_pages(dir_path, dest_dir_path):
+    """
+    Walks dir_path and returns the work for a build, in a stable (sorted) order.
+
+    Returns:
+        tuple: (pages, files, dirs) where pages is a list of (markdown path, html path) pairs,
+        files a list of (source path, destination directory) pairs for non-markdown files, and
+        dirs the list of destination directories that need to exist
+    """
+    pages, files, dirs = [], [], []
+    for kind, path, dest in iter_site(dir_path, dest_dir_path):
+        if kind == SITE_PAGE:
+            pages.append((path, dest))
+        elif kind == SITE_FILE:
+            files.append((path, dest))
+        else:
+            dirs.append(path)
+    return pages, files, dirs
+
+
+# The compiled page template, set once per worker process by set_worker_template
+worker_template = None
+
+# Jobs are handed to worker processes in batches of this many, and at most MAX_PENDING_BATCHES
+# batches per worker are queued at once, so memory stays flat however large the site is
+JOB_BATCH_SIZE = 16
+MAX_PENDING_BATCHES = 4
+
+
+def set_worker_template(template):
+    global worker_template
+    worker_template = template
+
+
+def init_worker(template, profile, document_cache=None, inline_cache=None):
+    """
+    Pool initializer: hands the worker the compiled template, turns on profiling if asked, shares
+    the parent's document cache directory and gives the worker an inline cache of the same size
+    as the parent's
+    """
+    set_worker_template(template)
+    if profile:
+        enable_profiling()
+    if document_cache is not None:
+        markdown_to_html.enable_document_cache(document_cache.path, document_cache.max_bytes)
+    if inline_cache is not None:
+        markdown_to_html.enable_inline_cache(inline_cache.maxsize)
+
+
+def render_page(job):
+    """
+    Worker entry point: renders one (from_path, template_path, dest_path, stream, gzip_level) job
+    quietly and returns (whether dest_path changed, the source_info of the markdown rendered).
+    """
+    from_path, template_path, dest_path, stream, gzip_level = job
+    render = generate_page_streaming if stream else generate_page
+    source_info = {}
+    changed = render(
+        from_path,
+        template_path,
+        dest_path,
+        verbose=False,
+        template=worker_template,
+        gzip_level=gzip_level,
+        source_info=source_info,
+    )
+    return changed, source_info
+
+
+def run_job(job):
+    """
+    Worker entry point: runs a (SITE_PAGE, render job), (SITE_FILE, (source, dest dir, gzip
+    level)) or (SITE_GZIP, (file path, gzip level)) job. Returns (changed, size, timings,
+    source_info): whether the output changed on disk, how many bytes were written if it did, when
+    profiling the phase timings of a page, and the source_info of the markdown a page was rendered
+    from.
+    """
+    kind, args = job
+    if kind == SITE_PAGE:
+        changed, source_info = render_page(args)
+        size = os.path.getsize(args[2]) if changed else 0
+        timings = profiler.pages.pop()[1] if profiler is not None else None
+        return changed, size, timings, source_info
+    if kind == SITE_GZIP:
+        write_gzip_sidecar(*args)
+        return True, 0, None, None
+    source_path, dest_dir, gzip_level = args
+    dest_path = os.path.join(dest_dir, os.path.basename(source_path))
+    changed = not file_is_current(source_path, dest_path)
+    if changed:
+        place_file(source_path, dest_path)
+    update_gzip_sidecar(dest_path, gzip_level, changed)
+    return changed, os.path.getsize(dest_path) if changed else 0, None, None
+
+
+def run_jobs(batch):
+    """
+    Worker entry point: runs a batch of jobs and returns (their results, the inline cache counts
+    taken since the last batch, or None when the inline cache is off)
+    """
+    results = [run_job(job) for job in batch]
+    inline_cache = markdown_to_html.inline_cache
+    return results, inline_cache.take_counts() if inline_cache is not None else None
+
+
+def report_job(job, result, template_path, manifest):
+    """
+    Logs a finished job in the parent process, and records rendered pages in the manifest and
+    their timings in the profiler
+    """
+    kind, args = job
+    changed, size, timings, source_info = result
+    if kind == SITE_PAGE:
+        from_path, _, dest_path, _, _ = args
+        buildlog.log.page(from_path, dest_path, template_path, changed, size)
+        if timings is not None:
+            profiler.record(from_path, timings)
+        if manifest is not None and source_info:
+            manifest.record(from_path, dest_path, source_info)
+    elif kind == SITE_FILE and changed:
+        source_path, dest_dir, _ = args
+        buildlog.log.asset(source_path, os.path.join(dest_dir, os.path.basename(source_path)), size)
+
+
+def generate_pages_recursive(
+    dir_path,
+    template_path,
+    dest_dir_path,
+    stream=False,
+    jobs=1,
+    manifest=None,
+    gzip_level=None,
+    compress=(),
+):
+    """
+    Generates an HTML page for every markdown file under dir_path, writing it to the matching path
+    under dest_dir_path. Other files are copied across as they are.
+
+    Discovery (iter_site) feeds render and copy jobs straight into a bounded queue as it walks the
+    tree, creating each output directory once, as soon as it is found. Jobs run in order, or in a
+    pool of worker processes when jobs is greater than 1 (0 means one per CPU). Workers are only
+    handed file paths, and results are reported to buildlog.log by the parent in discovery order,
+    so a parallel build logs exactly what a serial build does. With stream=True, pages are written
+    block by block with generate_page_streaming.
+
+    When a BuildManifest is passed in, the build is incremental: pages whose source, template and
+    output are unchanged since the last build are skipped, outputs of deleted sources are removed,
+    and the updated manifest is saved at the end.
+
+    Pages that render to exactly what is already on disk are not rewritten; the log counts how
+    many pages were actually written, so deploys can be scoped to them. With a gzip_level, the
+    workers also write a .gz sidecar for each page and copied file (see put_file), and for every
+    file in compress: the static files sync_content or copy_content collected, which are
+    compressed by the same jobs or pool as the pages, ahead of them.
+
+    Returns:
+        int: the number of pages generated
+    """
+    template = Template.from_file(template_path)
+    if manifest is not None:
+        manifest.start_build(template.hash, PARSER_VERSION)
+        drop_stale_gzip_sidecars(dest_dir_path, manifest, gzip_level)
+        manifest.gzip_level = gzip_level
+    os.makedirs(dest_dir_path, exist_ok=True)
+    source_paths = set()
+    rendered = 0
+
+    def discover():
+        nonlocal rendered
+        for file_path in compress:
+            yield SITE_GZIP, (file_path, gzip_level)
+        for kind, path, dest in iter_site(dir_path, dest_dir_path):
+            if kind == SITE_DIR:
+                os.makedirs(path, exist_ok=True)
+            elif kind == SITE_FILE:
+                yield SITE_FILE, (path, dest, gzip_level)
+            else:
+                source_paths.add(path)
+                if (
+                    manifest is not None
+                    and manifest.is_fresh(path, dest)
+                    and not needs_gzip_sidecar(dest, gzip_level, False)
+                ):
+                    buildlog.log.unchanged_pages(1)
+                    continue
+                rendered += 1
+                yield SITE_PAGE, (path, template_path, dest, stream, gzip_level)
+
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    if jobs > 1:
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=init_worker,
+            initargs=(
+                template,
+                profiler is not None,
+                markdown_to_html.document_cache,
+                markdown_to_html.inline_cache,
+            ),
+        ) as executor:
+            pending = deque()
+            batch = []
+            for job in discover():
+                batch.append(job)
+                if len(batch) < JOB_BATCH_SIZE:
+                    continue
+                pending.append((batch, executor.submit(run_jobs, batch)))
+                batch = []
+                if len(pending) >= jobs * MAX_PENDING_BATCHES:
+                    finish_batch(*pending.popleft(), template_path, manifest)
+            if batch:
+                pending.append((batch, executor.submit(run_jobs, batch)))
+            while pending:
+                finish_batch(*pending.popleft(), template_path, manifest)
+    else:
+        set_worker_template(template)
+        for job in discover():
+            report_job(job, run_job(job), template_path, manifest)
+
+    if manifest is not None:
+        for removed_path in manifest.remove_missing(source_paths):
+            buildlog.log.remove(removed_path)
+        manifest.save()
+    return rendered
+
+
+def finish_batch(batch, future, template_path, manifest):
+    """Waits for a batch of jobs to finish and reports them"""
+    results, inline_counts = future.result()
+    for job, result in zip(batch, results):
+        report_job(job, result, template_path, manifest)
+    if inline_counts is not None:
+        markdown_to_html.inline_cache.add_counts(inline_counts)
 
 
 if __name__ == "__main__":
 
     # html_file = generate_page(source, template, destination)
     generate_pages_recursive("content", "template.html", "test_dir")
+    buildlog.log.summary()
@@ -0,0 +1,313 @@
+import buildlog
+import os
+import threading
+import time
+from block_cache import BlockCache
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from manifest import BuildManifest
+from template import Template
+from urllib.parse import urlsplit
+from utils import (
+    generate_page,
+    generate_pages_recursive,
+    place_file,
+    remove_gzip_sidecar,
+    sync_content,
+    update_gzip_sidecar,
+)
+
+
+LIVE_RELOAD_PATH = "/__livereload"
+LIVE_RELOAD_SCRIPT = (
+    f'<script>new EventSource("{LIVE_RELOAD_PATH}").onmessage = () => location.reload();</script>'
+)
+
+
+class SiteWatcher:
+    """
+    Polls the content and static directories and the template with plain os.stat calls, and
+    applies each change to the public directory with the smallest rebuild that covers it:
+        - a changed markdown file re-renders only its own page
+        - a changed static asset (or non-markdown content file) is re-copied on its own
+        - a changed template rebuilds every page
+        - a deleted source has its output removed
+
+    Errors are reported to the build log and never stop the watcher. A full rebuild that fails is
+    redone on the next change, which is usually the fix.
+
+    The build manifest at manifest_path is kept up to date, so a later incremental build (or the
+    next watch session) only redoes work for files changed while nothing was watching.
+
+    The rendered blocks of every page re-rendered are kept in block_cache, so the next edit to the
+    same page only renders the blocks that it changed.
+    """
+
+    def __init__(
+        self,
+        content_dir="content",
+        static_dir="static",
+        template_path="template.html",
+        public_dir="public",
+        manifest_path=".build-manifest.json",
+        gzip_level=None,
+    ):
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.public_dir = public_dir
+        self.gzip_level = gzip_level
+        self.manifest = BuildManifest.load(manifest_path)
+        self.template = Template.from_file(template_path)
+        self.block_cache = BlockCache()
+        self.rebuild_pending = False
+        self.files = {}
+        self.files = self.scan()
+
+    def scan(self):
+        """Returns {path: (size, mtime_ns)} for the template and every watched file"""
+        files = {}
+        for source_dir in (self.content_dir, self.static_dir):
+            for dir_path, _, file_names in os.walk(source_dir):
+                for file_name in file_names:
+                    file_path = os.path.join(dir_path, file_name)
+                    try:
+                        stat = os.stat(file_path)
+                    except FileNotFoundError:
+                        continue
+                    files[file_path] = (stat.st_size, stat.st_mtime_ns)
+        try:
+            stat = os.stat(self.template_path)
+            files[self.template_path] = (stat.st_size, stat.st_mtime_ns)
+        except FileNotFoundError:
+            # An editor's atomic save removes the template for a moment; treat it as unchanged
+            if self.template_path in self.files:
+                files[self.template_path] = self.files[self.template_path]
+        return files
+
+    def output_path(self, source_path):
+        """The output of source_path, normalized the same way sync_content names its keys"""
+        if source_path.startswith(self.static_dir + os.sep):
+            relative_path = os.path.relpath(source_path, self.static_dir)
+        else:
+            relative_path = os.path.relpath(source_path, self.content_dir)
+            base_name, ext = os.path.splitext(relative_path)
+            if ext == ".md":
+                relative_path = base_name + ".html"
+        return os.path.normpath(os.path.join(self.public_dir, relative_path))
+
+    def build(self):
+        """Builds the whole site, re-rendering only what the manifest says is out of date"""
+        sync_content(
+            self.static_dir, self.public_dir, manifest=self.manifest, gzip_level=self.gzip_level
+        )
+        generate_pages_recursive(
+            self.content_dir,
+            self.template_path,
+            self.public_dir,
+            manifest=self.manifest,
+            gzip_level=self.gzip_level,
+        )
+
+    def poll(self):
+        """
+        Rescans the watched files and applies any changes.
+
+        Returns:
+            list: the output paths that changed on disk or were removed (empty if nothing changed,
+            including when a source was saved without changing the page it renders to)
+        """
+        files = self.scan()
+        changed = [path for path, signature in files.items() if self.files.get(path) != signature]
+        removed = [path for path in self.files if path not in files]
+        self.files = files
+        if not changed and not removed:
+            return []
+
+        buildlog.log.reset()
+        if self.template_path in changed or self.rebuild_pending:
+            buildlog.log.info(f"{self.template_path} changed... rebuilding every page")
+            try:
+                self.template = Template.from_file(self.template_path)
+                self.build()
+                self.rebuild_pending = False
+            except Exception as e:
+                # Retried on the next change, which is likely the fix
+                buildlog.log.error(f"Failed to rebuild the site: {e}")
+                self.rebuild_pending = True
+            buildlog.log.summary()
+            return [self.public_dir]
+
+        outputs = []
+        for source_path in changed:
+            output_path = self.output_path(source_path)
+            try:
+                if source_path.endswith(".md") and source_path.startswith(self.content_dir):
+                    source_info = {}
+                    page_changed = generate_page(
+                        source_path,
+                        self.template_path,
+                        output_path,
+                        template=self.template,
+                        gzip_level=self.gzip_level,
+                        block_cache=self.block_cache,
+                        source_info=source_info,
+                    )
+                    self.manifest.record(source_path, output_path, source_info)
+                    if not page_changed:
+                        continue
+                else:
+                    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                    place_file(source_path, output_path)
+                    update_gzip_sidecar(output_path, self.gzip_level, True)
+                    buildlog.log.asset(source_path, output_path, os.path.getsize(output_path))
+                    if source_path.startswith(self.static_dir + os.sep):
+                        self.manifest.assets[output_path] = source_path
+            except Exception as e:
+                buildlog.log.error(f"Failed to update {output_path}: {e}")
+                continue
+            outputs.append(output_path)
+        for source_path in removed:
+            output_path = self.output_path(source_path)
+            self.block_cache.discard(source_path)
+            self.manifest.pages.pop(source_path, None)
+            self.manifest.assets.pop(output_path, None)
+            if os.path.isfile(output_path):
+                buildlog.log.remove(output_path)
+                os.remove(output_path)
+                remove_gzip_sidecar(output_path)
+                outputs.append(output_path)
+        self.manifest.save()
+        buildlog.log.summary()
+        return outputs
+
+
+class LiveReload:
+    """Tells connected browsers to reload: each call to notify bumps a generation counter"""
+
+    def __init__(self):
+        self.generation = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        with self.condition:
+            self.generation += 1
+            self.condition.notify_all()
+
+    def wait(self, generation, timeout=None):
+        """Blocks until the generation moves past the given one (or timeout) and returns it"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.generation != generation, timeout)
+            return self.generation
+
+
+def inject_live_reload(html):
+    """Adds the live reload script to an HTML page, just before </body> if there is one"""
+    index = html.rfind(b"</body>")
+    if index == -1:
+        return html + LIVE_RELOAD_SCRIPT.encode("utf-8")
+    return html[:index] + LIVE_RELOAD_SCRIPT.encode("utf-8") + html[index:]
+
+
+class LiveReloadHandler(SimpleHTTPRequestHandler):
+    """
+    Serves the public directory like http.server does, adds the live reload script to HTML pages,
+    and streams a server-sent event to LIVE_RELOAD_PATH whenever the site is rebuilt. A directory
+    requested without its trailing slash (/blog) is redirected to the slash form.
+    """
+
+    def __init__(self, *args, live_reload=None, **kwargs):
+        self.live_reload = live_reload
+        super().__init__(*args, **kwargs)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == LIVE_RELOAD_PATH:
+            self.send_events()
+            return
+        file_path = self.translate_path(self.path)
+        if os.path.isdir(file_path):
+            parts = urlsplit(self.path)
+            if not parts.path.endswith("/"):
+                # As http.server does, so relative links on the directory's page resolve
+                self.send_response(301)
+                self.send_header("Location", parts._replace(path=parts.path + "/").geturl())
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            file_path = os.path.join(file_path, "index.html")
+        if not file_path.endswith(".html") or not os.path.isfile(file_path):
+            super().do_GET()
+            return
+        with open(file_path, "rb") as f:
+            body = inject_live_reload(f.read())
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        generation = self.live_reload.generation
+        try:
+            while True:
+                current = self.live_reload.wait(generation, timeout=15)
+                message = b": keep-alive\n\n" if current == generation else b"data: reload\n\n"
+                generation = current
+                self.wfile.write(message)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+
+def make_server(public_dir, live_reload, port=8888):
+    handler = partial(LiveReloadHandler, directory=public_dir, live_reload=live_reload)
+    server = ThreadingHTTPServer(("", port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def watch(
+    content_dir="content",
+    static_dir="static",
+    template_path="template.html",
+    public_dir="public",
+    manifest_path=".build-manifest.json",
+    port=8888,
+    interval=0.05,
+    gzip_level=None,
+):
+    """
+    Builds the site, serves public_dir on the given port, then polls for changes every interval
+    seconds, rebuilding just what changed and telling connected browsers to reload.
+    """
+    watcher = SiteWatcher(
+        content_dir, static_dir, template_path, public_dir, manifest_path, gzip_level
+    )
+    buildlog.log.reset()
+    watcher.build()
+    buildlog.log.summary()
+
+    live_reload = LiveReload()
+    server = make_server(public_dir, live_reload, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    buildlog.log.info(
+        f"Watching {content_dir}/, {static_dir}/ and {template_path}; serving on port {port}"
+    )
+    buildlog.log.flush()
+    try:
+        while True:
+            if watcher.poll():
+                live_reload.notify()
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+
+from bench.compare import compare_results
+from bench.corpus import BLOCK_KINDS, generate_corpus, parse_mix, write_corpus
+from bench.memory import STAGES, report, run_memory
+from bench.stages import TEMPLATE
+from markdown_to_html import markdown_to_html_node
+from template import Template
+
+
+def results(**best):
+    return {"meta": {}, "stages": {stage: {"best": value} for stage, value in best.items()}}
+
+
+class TestCorpus(unittest.TestCase):
+    def test_same_seed_same_corpus(self):
+        self.assertEqual(generate_corpus(5, 10, seed=3), generate_corpus(5, 10, seed=3))
+        self.assertNotEqual(generate_corpus(5, 10, seed=3), generate_corpus(5, 10, seed=4))
+
+    def test_corpus_shape(self):
+        documents = generate_corpus(4, 12)
+        self.assertEqual(len(documents), 4)
+        for i, document in enumerate(documents):
+            self.assertTrue(document.startswith(f"# Page {i}: "))
+            self.assertEqual(len(document.strip().split("\n\n")), 13)
+
+    def test_every_block_kind_renders(self):
+        for kind in BLOCK_KINDS:
+            for document in generate_corpus(3, 10, {kind: 1}):
+                markdown_to_html_node(document).to_html()
+
+    def test_mix(self):
+        self.assertEqual(parse_mix("paragraph=3,code=1"), {"paragraph": 3, "code": 1})
+        with self.assertRaises(ValueError):
+            parse_mix("tables=1")
+        with self.assertRaises(ValueError):
+            generate_corpus(1, 1, {"code": 0})
+
+
+class TestCompare(unittest.TestCase):
+    def test_regression_past_threshold(self):
+        rows = compare_results(results(tree=1.0, build=2.0), results(tree=1.2, build=2.1))
+        self.assertEqual([(row[0], row[4]) for row in rows], [("tree", True), ("build", False)])
+
+    def test_stage_threshold(self):
+        rows = compare_results(results(tree=1.0), results(tree=1.2), 0.1, {"tree": 0.25})
+        self.assertFalse(rows[0][4])
+
+    def test_only_common_stages(self):
+        rows = compare_results(results(tree=1.0), results(tree=0.5, build=9.0))
+        self.assertEqual(len(rows), 1)
+        self.assertAlmostEqual(rows[0][3], -0.5)
+
+
+class TestMemory(unittest.TestCase):
+    def test_run_memory(self):
+        with tempfile.TemporaryDirectory() as root:
+            sources = write_corpus(generate_corpus(3, 20), os.path.join(root, "content"))
+            results = run_memory(sources, Template(TEMPLATE), top=5)
+        self.assertEqual([page["source"] for page in results["pages"]], sources)
+        for page in results["pages"]:
+            self.assertEqual(list(page["stages"]), list(STAGES))
+            for measurement in [*page["stages"].values(), page["page"]]:
+                self.assertGreaterEqual(measurement["peak"], measurement["retained"])
+            self.assertGreater(page["stages"]["tree"]["retained"], page["bytes"])
+            self.assertGreater(page["page"]["peak"], page["bytes"])
+        self.assertEqual(len(results["allocators"]), 5)
+        self.assertIn("generate_page", report(results))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from block_cache import BlockCache
+from markdown_to_html import markdown_to_document, markdown_to_html_incremental
+
+
+markdown_text = """
+# Handbook
+
+An opening paragraph with **bold** text and a [link](https://www.boot.dev).
+
+## Setup
+
+1. First step
+2. Second step
+
+```
+make install
+```
+
+> A quote
+
+An opening paragraph with **bold** text and a [link](https://www.boot.dev).
+"""
+
+
+def full_render(markdown):
+    document = markdown_to_document(markdown)
+    return document.node.to_html(), document.title
+
+
+class TestBlockCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = BlockCache()
+
+    def render(self, markdown, key="handbook.md"):
+        return markdown_to_html_incremental(markdown, self.cache, key)
+
+    def test_matches_full_render(self):
+        self.assertEqual(self.render(markdown_text), full_render(markdown_text))
+        self.assertEqual(self.render(markdown_text), full_render(markdown_text))
+
+    def test_only_changed_blocks_are_rendered(self):
+        self.render(markdown_text)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 6))
+        edited = markdown_text.replace("2. Second step", "2. Second step\n3. Third step")
+        self.assertEqual(self.render(edited), full_render(edited))
+        self.assertEqual((self.cache.hits, self.cache.misses), (7, 7))
+
+    def test_edits_across_renders(self):
+        edits = [
+            markdown_text,
+            markdown_text.replace("# Handbook", "# Renamed handbook"),
+            markdown_text.replace("> A quote", "> A quote\n\nA new paragraph"),
+            markdown_text.replace("## Setup\n\n", ""),
+            "\n\n".join(reversed(markdown_text.strip().split("\n\n"))),
+            "Just a paragraph, no title",
+        ]
+        for markdown in edits:
+            self.assertEqual(self.render(markdown), full_render(markdown))
+
+    def test_fragments_are_replaced_each_render(self):
+        self.render(markdown_text)
+        self.render("# Short\n\nNew text")
+        self.assertEqual(set(self.cache.fragments("handbook.md")), {"# Short", "New text"})
+        self.render(markdown_text, "other.md")
+        self.assertEqual(self.cache.stats()["documents"], 2)
+        self.cache.discard("handbook.md")
+        self.assertEqual(self.cache.fragments("handbook.md"), {})
+
+    def test_empty_document(self):
+        with self.assertRaises(ValueError):
+            self.render("\n\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
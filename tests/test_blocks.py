@@ -1,6 +1,6 @@
 import unittest
 
-from markdown_to_html import BlockType, markdown_to_blocks, block_to_block_type
+from markdown_to_html import BlockType, markdown_to_blocks, block_to_block_type, scan_blocks
 
 
 # ----- Test Data ----- #
@@ -193,3 +193,25 @@ class TestTextNode(unittest.TestCase):
             BlockType.ORDERED_LIST,
         ]
         self.assertEqual(test_types, expected_types)
+
+    # ----- Testing the Block Scanner -----
+    def test_scan_blocks_matches_split_and_classify(self):
+        documents = [markdown, markdown2, markdown3, "\n\n".join(block_type_test_data)]
+        for document in documents:
+            scanned = [
+                (block_type, document[start:end])
+                for block_type, (start, end) in scan_blocks(document)
+            ]
+            expected_result = [
+                (block_to_block_type(block), block) for block in markdown_to_blocks(document)
+            ]
+            self.assertEqual(scanned, expected_result)
+
+    def test_scan_blocks_spans(self):
+        document = "  # Heading  \n\n\n1. one\n2. two\n   \n"
+        expected_result = [
+            (BlockType.HEADING, (2, 11)),
+            (BlockType.ORDERED_LIST, (16, 29)),
+        ]
+        self.assertEqual(list(scan_blocks(document)), expected_result)
+        self.assertEqual(list(scan_blocks("  \n\n \n")), [])
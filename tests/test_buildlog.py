@@ -0,0 +1,68 @@
+import json
+import unittest
+from io import StringIO
+from buildlog import NORMAL, QUIET, VERBOSE, BuildLog
+
+
+class TestBuildLog(unittest.TestCase):
+    def run_build(self, level, json_lines=False):
+        stream = StringIO()
+        log = BuildLog(level, json_lines, stream)
+        log.page("content/index.md", "public/index.html", "template.html", True, 120)
+        log.page("content/about.md", "public/about.html", "template.html", False)
+        log.unchanged_pages(3)
+        log.asset("static/index.css", "public/index.css", 30)
+        log.remove("public/old.html")
+        log.error("Failed to update public/broken.html")
+        return log, stream
+
+    def test_levels(self):
+        for level, expected in ((QUIET, 2), (NORMAL, 3), (VERBOSE, 6)):
+            log, stream = self.run_build(level)
+            self.assertEqual(stream.getvalue(), "")
+            log.summary()
+            self.assertEqual(len(stream.getvalue().splitlines()), expected)
+
+    def test_summary(self):
+        log, stream = self.run_build(VERBOSE)
+        log.summary()
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(
+            lines[0], "Generating page from content/index.md to public/index.html using template.html"
+        )
+        self.assertEqual(lines[2], "source file=static/index.css --> dest file=public/index.css")
+        self.assertTrue(
+            lines[-1].startswith(
+                "Built 2 pages (1 written, 3 unchanged), copied 1 assets, wrote 150 bytes, "
+                "removed 1 files, 1 errors in "
+            )
+        )
+
+    def test_json_lines(self):
+        log, stream = self.run_build(VERBOSE, json_lines=True)
+        log.summary()
+        events = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(
+            [event["event"] for event in events],
+            ["page", "page", "asset", "removed", "error", "summary"],
+        )
+        self.assertEqual(events[0]["bytes"], 120)
+        summary = events[-1]
+        self.assertEqual(
+            (summary["pages"], summary["written"], summary["assets"], summary["bytes"]),
+            (2, 1, 1, 150),
+        )
+        self.assertIn("seconds", summary)
+
+    def test_buffer_is_written_when_full(self):
+        stream = StringIO()
+        log = BuildLog(VERBOSE, stream=stream)
+        for i in range(600):
+            log.asset(f"static/{i}.css", f"public/{i}.css")
+        self.assertEqual(len(stream.getvalue().splitlines()), 512)
+        log.flush()
+        self.assertEqual(len(stream.getvalue().splitlines()), 600)
+
+
+if __name__ == "__main__":
+    unittest.main()
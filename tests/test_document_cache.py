@@ -0,0 +1,118 @@
+import os
+import tempfile
+import unittest
+import markdown_to_html
+from document_cache import DocumentCache, decode_node, encode_node
+from htmlnode import LeafNode, ParentNode
+from markdown_to_html import (
+    disable_document_cache,
+    enable_document_cache,
+    markdown_to_document,
+    markdown_to_html_node,
+)
+
+
+markdown_text = """
+# Cache test
+
+A paragraph with **bold**, *italic*, `code` and a [link](https://www.boot.dev).
+
+![an image](/images/cache.png)
+
+## Second heading
+
+- First item
+- Second item
+
+> A quote
+"""
+
+
+class TestDocumentCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp.name, "cache")
+
+    def tearDown(self):
+        disable_document_cache()
+        self.tmp.cleanup()
+
+    def test_encode_round_trip(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode(None, "text"), LeafNode("a", "link", {"href": "/x"})]),
+                LeafNode("img", "", {"src": "/a.png", "alt": "a"}),
+            ],
+        )
+        self.assertEqual(decode_node(encode_node(node)), node)
+
+    def test_document_loaded_from_cache(self):
+        parsed = markdown_to_document(markdown_text)
+        cache = enable_document_cache(self.cache_dir)
+        markdown_to_document(markdown_text)
+        self.assertEqual(cache.stats(), {"hits": 0, "misses": 1, "writes": 1, "evictions": 0})
+        cached = markdown_to_document(markdown_text)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cached.node, parsed.node)
+        self.assertEqual(cached.node.to_html(), parsed.node.to_html())
+        self.assertEqual(
+            (cached.title, cached.headings, cached.word_count),
+            (parsed.title, parsed.headings, parsed.word_count),
+        )
+        self.assertEqual(markdown_to_html_node(markdown_text), parsed.node)
+        self.assertEqual(cache.hits, 2)
+
+    def test_key_depends_on_source_and_version(self):
+        cache = DocumentCache(self.cache_dir, version=1)
+        other_version = DocumentCache(self.cache_dir, version=2)
+        self.assertNotEqual(cache.key(markdown_text), cache.key(markdown_text + "\nMore"))
+        self.assertNotEqual(cache.key(markdown_text), other_version.key(markdown_text))
+        self.assertEqual(
+            enable_document_cache(self.cache_dir).version, markdown_to_html.PARSER_VERSION
+        )
+
+    def test_unreadable_entry_is_a_miss(self):
+        cache = DocumentCache(self.cache_dir)
+        key = cache.key(markdown_text)
+        with open(cache.entry_path(key), "w") as f:
+            f.write('{"node": ["div", [')
+        self.assertIsNone(cache.get(key))
+        self.assertIsNone(cache.get(cache.key("missing")))
+        self.assertEqual(cache.misses, 2)
+
+    def test_prune_removes_least_recently_used(self):
+        cache = DocumentCache(self.cache_dir, max_bytes=10**6)
+        keys = [cache.key(f"# Page {i}") for i in range(4)]
+        for i, key in enumerate(keys):
+            cache.put(key, ParentNode("div", [LeafNode("h1", f"Page {i}")]), f"Page {i}")
+            os.utime(cache.entry_path(key), (1000 + i, 1000 + i))
+        cache.get(keys[0])
+        stale_temp = os.path.join(self.cache_dir, "abandoned.tmp")
+        open(stale_temp, "w").close()
+        os.utime(stale_temp, (0, 0))
+
+        entry_size = os.path.getsize(cache.entry_path(keys[1]))
+        cache.max_bytes = entry_size * 3
+        self.assertEqual(cache.prune(), 2)
+        remaining = [os.path.exists(cache.entry_path(key)) for key in keys]
+        self.assertEqual(remaining, [True, False, False, True])
+        self.assertFalse(os.path.exists(stale_temp))
+        self.assertEqual(cache.evictions, 2)
+
+    def test_put_prunes_as_it_writes(self):
+        cache = DocumentCache(self.cache_dir, max_bytes=2000)
+        for i in range(50):
+            cache.put(cache.key(f"# Page {i}"), ParentNode("div", [LeafNode("h1", f"Page {i}")]))
+        total = sum(entry.stat().st_size for entry in os.scandir(self.cache_dir))
+        self.assertLessEqual(total, 2000)
+        self.assertGreater(cache.evictions, 0)
+        self.assertFalse([name for name in os.listdir(self.cache_dir) if name.endswith(".tmp")])
+
+    def test_invalid_max_bytes(self):
+        with self.assertRaises(ValueError):
+            DocumentCache(self.cache_dir, max_bytes=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import buildlog
+import os
+import tempfile
+import unittest
+import markdown_to_html
+from io import StringIO
+from htmlnode import LeafNode
+from inline_cache import InlineCache
+from markdown_to_html import (
+    disable_inline_cache,
+    enable_inline_cache,
+    markdown_to_html_node,
+    text_to_children,
+)
+from utils import generate_pages_recursive, put_file
+
+
+markdown_text = """
+# Byline test
+
+Written by [Jeff](https://www.favreje.com)
+
+Some *other* paragraph
+
+Written by [Jeff](https://www.favreje.com)
+"""
+
+
+class TestInlineCache(unittest.TestCase):
+    def tearDown(self):
+        disable_inline_cache()
+
+    def test_counters(self):
+        cache = InlineCache(maxsize=2)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", [LeafNode(None, "a")])
+        cache.put("b", [LeafNode(None, "b")])
+        self.assertEqual(cache.get("a"), [LeafNode(None, "a")])
+        cache.put("c", [LeafNode(None, "c")])
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(
+            cache.stats(), {"size": 2, "maxsize": 2, "hits": 1, "misses": 2, "evictions": 1}
+        )
+
+    def test_invalid_maxsize(self):
+        with self.assertRaises(ValueError):
+            InlineCache(maxsize=0)
+
+    def test_cache_is_opt_in(self):
+        self.assertIsNone(markdown_to_html.inline_cache)
+        text_to_children("Plain text")
+        self.assertIsNone(markdown_to_html.inline_cache)
+
+    def test_cached_render_matches_uncached(self):
+        expected_result = markdown_to_html_node(markdown_text)
+        cache = enable_inline_cache(maxsize=16)
+        self.assertEqual(markdown_to_html_node(markdown_text), expected_result)
+        self.assertEqual(markdown_to_html_node(markdown_text), expected_result)
+        self.assertEqual(cache.misses, 3)
+        self.assertEqual(cache.hits, 5)
+
+    def test_returned_list_is_a_copy(self):
+        enable_inline_cache()
+        children = text_to_children("Read **more**")
+        children.append(LeafNode(None, "extra"))
+        self.assertEqual(len(text_to_children("Read **more**")), 2)
+
+    def test_returned_nodes_are_copies(self):
+        enable_inline_cache()
+        text = "See [the docs](https://example.com) for **more**"
+        expected = text_to_children(text)
+        for node in text_to_children(text):
+            node.value = "changed"
+            if node.props:
+                node.props["href"] = "https://changed.example.com"
+        self.assertEqual(text_to_children(text), expected)
+
+    def test_take_and_add_counts(self):
+        worker = InlineCache()
+        worker.get("a")
+        worker.put("a", [LeafNode(None, "a")])
+        worker.get("a")
+        parent = InlineCache()
+        parent.add_counts(worker.take_counts())
+        self.assertEqual(worker.counts(), {"hits": 0, "misses": 0, "evictions": 0})
+        self.assertEqual(parent.counts(), {"hits": 1, "misses": 1, "evictions": 0})
+
+    def test_parallel_build_counts_worker_lookups(self):
+        buildlog.configure(stream=StringIO())
+        self.addCleanup(buildlog.configure)
+        with tempfile.TemporaryDirectory() as root:
+            content = os.path.join(root, "content")
+            template_path = os.path.join(root, "template.html")
+            put_file(template_path, "<title>{{ Title }}</title>{{ Content }}")
+            for i in range(4):
+                put_file(os.path.join(content, f"page{i}.md"), markdown_text)
+            cache = enable_inline_cache(maxsize=16)
+            generate_pages_recursive(content, template_path, os.path.join(root, "public"), jobs=2)
+        self.assertEqual(cache.hits + cache.misses, 4 * 4)
+        self.assertGreater(cache.hits, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,25 @@
+import unittest
+from contextlib import redirect_stderr
+from io import StringIO
+from main import parse_args
+
+
+class TestParseArgs(unittest.TestCase):
+    def test_defaults(self):
+        args = parse_args([])
+        self.assertEqual((args.command, args.jobs, args.profile), ("build", 1, False))
+
+    def test_profile_stats_implies_profile(self):
+        args = parse_args(["--profile-stats", "build.pstats"])
+        self.assertTrue(args.profile)
+        self.assertEqual(args.profile_stats, "build.pstats")
+
+    def test_inline_cache_size(self):
+        self.assertIsNone(parse_args([]).inline_cache)
+        self.assertEqual(parse_args(["--inline-cache", "256"]).inline_cache, 256)
+        with self.assertRaises(SystemExit), redirect_stderr(StringIO()):
+            parse_args(["--inline-cache", "0"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import buildlog
+import os
+import tempfile
+import unittest
+from io import StringIO
+from manifest import BuildManifest
+from utils import generate_page, generate_page_streaming, generate_pages_recursive, put_file
+
+
+TEMPLATE = "<title> {{ Title }} </title> {{ Content }}"
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.public = os.path.join(self.root, "public")
+        self.template_path = os.path.join(self.root, "template.html")
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+        put_file(self.template_path, TEMPLATE)
+        for name in ("first", "second", "third"):
+            put_file(os.path.join(self.content, name, "index.md"), f"# {name}\n\nSome text")
+        buildlog.configure(stream=StringIO())
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        buildlog.configure()
+
+    def build(self):
+        manifest = BuildManifest.load(self.manifest_path)
+        return generate_pages_recursive(
+            self.content, self.template_path, self.public, manifest=manifest
+        )
+
+    def test_noop_rebuild(self):
+        self.assertEqual(self.build(), 3)
+        self.assertEqual(self.build(), 0)
+
+    def test_changed_source(self):
+        self.build()
+        put_file(os.path.join(self.content, "second", "index.md"), "# second\n\nEdited")
+        self.assertEqual(self.build(), 1)
+        with open(os.path.join(self.public, "second", "index.html")) as f:
+            self.assertIn("<p>Edited</p>", f.read())
+
+    def test_touched_source(self):
+        self.build()
+        source_path = os.path.join(self.content, "first", "index.md")
+        stat = os.stat(source_path)
+        os.utime(source_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(self.build(), 0)
+
+    def test_missing_output(self):
+        self.build()
+        os.remove(os.path.join(self.public, "third", "index.html"))
+        self.assertEqual(self.build(), 1)
+
+    def test_template_change(self):
+        self.build()
+        put_file(self.template_path, "<h1> {{ Title }} </h1> {{ Content }}")
+        self.assertEqual(self.build(), 3)
+
+    def test_removed_source(self):
+        self.build()
+        os.remove(os.path.join(self.content, "third", "index.md"))
+        self.assertEqual(self.build(), 0)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "third", "index.html")))
+        self.assertEqual(len(BuildManifest.load(self.manifest_path).pages), 2)
+
+    def check_edit_after_render(self, render):
+        source_path = os.path.join(self.content, "first", "index.md")
+        output_path = os.path.join(self.public, "first", "index.html")
+        manifest = BuildManifest(self.manifest_path)
+        source_info = {}
+        render(
+            source_path, self.template_path, output_path, verbose=False, source_info=source_info
+        )
+        put_file(source_path, "# first\n\nEdited after the render")
+        manifest.record(source_path, output_path, source_info)
+        self.assertFalse(manifest.is_fresh(source_path, output_path))
+
+    def test_edit_after_render(self):
+        self.check_edit_after_render(generate_page)
+
+    def test_edit_after_streamed_render(self):
+        self.check_edit_after_render(generate_page_streaming)
+
+    def test_unreadable_manifest(self):
+        put_file(self.manifest_path, "{not json")
+        manifest = BuildManifest.load(self.manifest_path)
+        self.assertEqual(manifest.pages, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import io
 import unittest
 from markdown_to_html import *
 from htmlnode import *
@@ -261,6 +262,43 @@ class TestMarkdownToHTML(unittest.TestCase):
         expected_result = "Blog Post"
         self.assertEqual(title, expected_result)
 
+    def test_document(self):
+        document = markdown_to_document(markdown_text)
+        self.assertEqual(document.node, markdown_to_html_node(markdown_text))
+        self.assertEqual(document.title, "Blog Post")
+        self.assertEqual(
+            document.headings,
+            [
+                ("h1", "Blog Post"),
+                ("h2", "Second Point:"),
+                ("h3", "Markdown can contain **various** in-line *code*, links and images"),
+                ("h4", "Here are a few useful links:"),
+                ("h4", "And a funny image"),
+            ],
+        )
+
+    def test_document_word_count(self):
+        document = markdown_to_document("# Title\n\nSome **bold**ly placed words\n\n- one\n- two")
+        self.assertEqual(document.word_count, 7)
+
+        document = markdown_to_document(markdown_text_missing_header)
+        self.assertIsNone(document.title)
+
+    def test_streaming(self):
+        lines = io.StringIO(markdown_text)
+        self.assertEqual(list(read_blocks(lines)), markdown_to_blocks(markdown_text))
+
+        html = "".join(iter_markdown_html(io.StringIO(markdown_text)))
+        self.assertEqual(html, markdown_to_html_node(markdown_text).to_html())
+
+        self.assertEqual(extract_title_from_lines(io.StringIO(markdown_text)), "Blog Post")
+        with self.assertRaises(HeaderNotFoundException):
+            extract_title_from_lines(io.StringIO(markdown_text_missing_header))
+
+    def test_streaming_empty_document(self):
+        with self.assertRaises(ValueError):
+            next(iter_markdown_html(io.StringIO("\n\n   \n")))
+
     def test_exception(self):
         with self.assertRaises(HeaderNotFoundException):
             title = extract_title(markdown_text_missing_header)
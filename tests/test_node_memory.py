@@ -0,0 +1,81 @@
+import tracemalloc
+import unittest
+from htmlnode import HTMLNode, LeafNode, ParentNode
+from markdown_to_html import markdown_to_html_node
+from textnode import TextNode, TextType
+
+
+BLOCK_COUNT = 10000
+
+
+class DictNode:
+    """Same fields as HTMLNode, but stored in a per-instance __dict__"""
+
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+def synthetic_markdown(block_count):
+    blocks = [
+        "# Heading {i}",
+        "Paragraph {i} with **bold**, *italic* and a [link](https://example.com/{i}).",
+        "- item {i}\n- another item\n- last item",
+        "> quoted line {i}",
+    ]
+    return "\n\n".join(blocks[i % len(blocks)].format(i=i) for i in range(block_count))
+
+
+def copy_tree(node, leaf_class, parent_class):
+    if node.children is None:
+        return leaf_class(node.tag, node.value, node.props)
+    children = [copy_tree(child, leaf_class, parent_class) for child in node.children]
+    return parent_class(node.tag, children, node.props)
+
+
+def count_nodes(node):
+    if node.children is None:
+        return 1
+    return 1 + sum(count_nodes(child) for child in node.children)
+
+
+def bytes_per_node(tree, leaf_class, parent_class):
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        copied = copy_tree(tree, leaf_class, parent_class)
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (after - before) / count_nodes(copied)
+
+
+class TestNodeMemory(unittest.TestCase):
+    def test_no_instance_dict(self):
+        nodes = [
+            HTMLNode("p", "text"),
+            LeafNode("b", "bold"),
+            ParentNode("div", [LeafNode(None, "text")]),
+            TextNode("text", TextType.TEXT),
+        ]
+        for node in nodes:
+            self.assertFalse(hasattr(node, "__dict__"))
+            with self.assertRaises(AttributeError):
+                node.unexpected = True
+
+    def test_per_node_memory_reduction(self):
+        tree = markdown_to_html_node(synthetic_markdown(BLOCK_COUNT))
+        slotted = bytes_per_node(tree, LeafNode, ParentNode)
+        with_dict = bytes_per_node(
+            tree,
+            lambda tag, value, props: DictNode(tag, value, None, props),
+            lambda tag, children, props: DictNode(tag, None, children, props),
+        )
+        message = f"{slotted:.0f} bytes per slotted node, {with_dict:.0f} with __dict__"
+        self.assertLess(slotted, with_dict * 0.8, message)
+
+
+if __name__ == "__main__":
+    unittest.main()
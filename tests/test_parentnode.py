@@ -1,3 +1,5 @@
+import io
+import sys
 import unittest
 from htmlnode import *
 
@@ -82,3 +84,25 @@ class TestParentNode(unittest.TestCase):
         result = node.to_html()
         expectation = "<div><p>Hello, friend.</p></div>"
         self.assertEqual(result, expectation)
+
+    def test_props_placement(self):
+        node = ParentNode("div", [LeafNode("a", "link", {"href": "url"})], {"class": "wrap"})
+        expectation = '<div> class="wrap"<a href="url">link</a></div>'
+        self.assertEqual(node.to_html(), expectation)
+
+    def test_write_html(self):
+        node = ParentNode(
+            "ul", [ParentNode("li", [LeafNode("b", "Item 1")]), LeafNode("li", "Item 2")]
+        )
+        stream = io.StringIO()
+        node.write_html(stream)
+        self.assertEqual(stream.getvalue(), node.to_html())
+        self.assertEqual(stream.getvalue(), "<ul><li><b>Item 1</b></li><li>Item 2</li></ul>")
+
+    def test_deep_nesting(self):
+        depth = sys.getrecursionlimit() * 2
+        node = LeafNode(None, "deep")
+        for _ in range(depth):
+            node = ParentNode("span", [node])
+        result = node.to_html()
+        self.assertEqual(result, "<span>" * depth + "deep" + "</span>" * depth)
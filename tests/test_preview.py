@@ -0,0 +1,154 @@
+import gzip
+import os
+import tempfile
+import threading
+import unittest
+from http.client import HTTPConnection
+from utils import put_file
+from preview import PreviewSite, accepts_gzip, make_server
+
+
+TEMPLATE = "<html><title> {{ Title }} </title><body> {{ Content }}</body></html>"
+
+
+class TestPreviewSite(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.template_path = os.path.join(self.root, "template.html")
+        put_file(self.template_path, TEMPLATE)
+        put_file(os.path.join(self.content, "index.md"), "# Home\n\n" + "Welcome. " * 100)
+        put_file(os.path.join(self.content, "blog", "index.md"), "# Blog")
+        put_file(os.path.join(self.content, "blog", "post.md"), "# Post\n\nFirst draft")
+        put_file(os.path.join(self.static, "index.css"), "body {}")
+        self.site = PreviewSite(self.content, self.static, self.template_path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def touch(self, file_path, text):
+        put_file(file_path, text)
+        stat = os.stat(file_path)
+        os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    def test_resolve(self):
+        post_path = os.path.join(self.content, "blog", "post.md")
+        self.assertEqual(self.site.resolve("/"), (os.path.join(self.content, "index.md"), True))
+        blog_path = os.path.join(self.content, "blog", "index.md")
+        self.assertEqual(self.site.resolve("/blog/?page=2"), (blog_path, True))
+        self.assertEqual(self.site.resolve("/blog/post"), (post_path, True))
+        self.assertEqual(self.site.resolve("/blog/post.html"), (post_path, True))
+        css_path = os.path.join(self.static, "index.css")
+        self.assertEqual(self.site.resolve("/index.css"), (css_path, False))
+        self.assertEqual(self.site.resolve("/blog/post.md"), (None, False))
+        self.assertEqual(self.site.resolve("/../template.html"), (None, False))
+
+    def test_get_caches_until_source_changes(self):
+        post_path = os.path.join(self.content, "blog", "post.md")
+        response = self.site.get("/blog/post")
+        self.assertIn(b"<p>First draft</p>", response.body)
+        self.assertIs(self.site.get("/blog/post.html"), response)
+        self.touch(post_path, "# Post\n\nSecond draft")
+        self.assertIn(b"<p>Second draft</p>", self.site.get("/blog/post").body)
+
+    def test_get_rerenders_after_template_change(self):
+        response = self.site.get("/")
+        self.touch(self.template_path, TEMPLATE.replace("<body>", "<body><nav></nav>"))
+        changed = self.site.get("/")
+        self.assertIn(b"<nav></nav>", changed.body)
+        self.assertNotEqual(changed.etag, response.etag)
+
+    def test_cache_is_bounded_by_bytes(self):
+        site = PreviewSite(self.content, self.static, self.template_path, max_cache_bytes=1000)
+        home = site.get("/")
+        post = site.get("/blog/post")
+        self.assertLessEqual(site.cache_bytes, 1000)
+        self.assertEqual(list(site.cache), [os.path.join(self.content, "blog", "post.md")])
+        self.assertIsNot(site.get("/"), home)
+        self.assertIs(site.get("/blog/post"), post)
+        site.get("/index.css")
+        self.assertEqual(site.cache_bytes, sum(response.size() for response in site.cache.values()))
+
+    def test_redirect(self):
+        self.assertEqual(self.site.redirect("/blog?page=2"), "/blog/?page=2")
+        self.assertIsNone(self.site.redirect("/blog/"))
+        self.assertIsNone(self.site.redirect("/blog/post"))
+        self.assertIsNone(self.site.redirect("/missing"))
+
+
+class TestAcceptsGzip(unittest.TestCase):
+    def test_accepts_gzip(self):
+        for header in ("gzip", "gzip, deflate", "deflate, GZIP;q=0.5", "*", "br;q=1, *;q=0.1"):
+            with self.subTest(header=header):
+                self.assertTrue(accepts_gzip(header))
+        for header in ("", "gzip;q=0", "x-gzip-foo", "deflate", "*;q=0", "*, gzip;q=0.0"):
+            with self.subTest(header=header):
+                self.assertFalse(accepts_gzip(header))
+
+
+class TestPreviewServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        put_file(os.path.join(root, "template.html"), TEMPLATE)
+        put_file(os.path.join(root, "content", "index.md"), "# Home\n\n" + "Welcome. " * 100)
+        put_file(os.path.join(root, "content", "broken.md"), "No title")
+        put_file(os.path.join(root, "content", "section", "index.md"), "# Section")
+        site = PreviewSite(
+            os.path.join(root, "content"),
+            os.path.join(root, "static"),
+            os.path.join(root, "template.html"),
+        )
+        self.server = make_server(site, port=0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.connection = HTTPConnection("127.0.0.1", self.server.server_address[1])
+
+    def tearDown(self):
+        self.connection.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def request(self, path, headers=None):
+        self.connection.request("GET", path, headers=headers or {})
+        response = self.connection.getresponse()
+        return response, response.read()
+
+    def test_etag_and_not_modified(self):
+        response, body = self.request("/")
+        self.assertEqual(response.status, 200)
+        self.assertIn(b"<h1>Home</h1>", body)
+        etag = response.getheader("ETag")
+        response, body = self.request("/", {"If-None-Match": etag})
+        self.assertEqual(response.status, 304)
+        self.assertEqual(body, b"")
+
+    def test_gzip(self):
+        _, plain = self.request("/")
+        response, body = self.request("/", {"Accept-Encoding": "gzip, deflate"})
+        self.assertEqual(response.getheader("Content-Encoding"), "gzip")
+        self.assertEqual(gzip.decompress(body), plain)
+        self.assertLess(len(body), len(plain))
+        response, body = self.request("/", {"Accept-Encoding": "gzip;q=0, deflate"})
+        self.assertIsNone(response.getheader("Content-Encoding"))
+        self.assertEqual(body, plain)
+
+    def test_directory_without_slash_redirects(self):
+        response, body = self.request("/section?x=1")
+        self.assertEqual(response.status, 301)
+        self.assertEqual(response.getheader("Location"), "/section/?x=1")
+        response, body = self.request("/section/")
+        self.assertEqual(response.status, 200)
+        self.assertIn(b"<h1>Section</h1>", body)
+
+    def test_errors(self):
+        self.assertEqual(self.request("/missing")[0].status, 404)
+        response, body = self.request("/broken")
+        self.assertEqual(response.status, 500)
+        self.assertIn(b"No H1 header", body)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+from profiler import BuildProfiler, percentile
+
+
+class TestBuildProfiler(unittest.TestCase):
+    def setUp(self):
+        self.profiler = BuildProfiler()
+        for i in range(1, 11):
+            self.profiler.record(f"content/page{i}.md", {"read": i * 1000, "parse": i * 5000})
+        self.profiler.record("content/streamed.md", {"title": 2000, "stream": 30000})
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 90), 7)
+        self.assertEqual(percentile([], 50), 0)
+
+    def test_phase_stats(self):
+        stats = self.profiler.phase_stats()
+        self.assertEqual(list(stats), ["read", "parse", "title", "stream"])
+        self.assertEqual(
+            stats["parse"],
+            {"total": 275000, "count": 10, "max": 50000, "p50": 25000, "p90": 45000, "p99": 50000},
+        )
+        self.assertEqual(stats["stream"]["count"], 1)
+
+    def test_slowest(self):
+        slowest = self.profiler.slowest(2)
+        self.assertEqual(
+            [(total, source) for total, source, _ in slowest],
+            [(60000, "content/page10.md"), (54000, "content/page9.md")],
+        )
+
+    def test_report(self):
+        report = self.profiler.report(3).splitlines()
+        self.assertEqual(report[0], "Profile of 11 pages, 0.4 ms in page phases")
+        self.assertTrue(report[3].startswith("parse"))
+        self.assertEqual(report[6], "Slowest 3 pages:")
+        self.assertEqual(
+            report[7], "      0.06 ms  content/page10.md  (read 0.01, parse 0.05)"
+        )
+        self.assertEqual(len(report), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import io
+import pickle
+import unittest
+from template import Template
+
+
+TEMPLATE = """<html>
+<head><title> {{ Title }} </title></head>
+<body>
+    {{ Content }}
+</body>
+</html>"""
+
+TRICKY_TEMPLATES = [
+    TEMPLATE,
+    "No placeholders at all",
+    " {{ Title }} {{ Content }}",
+    " {{ Title }}{{ Content }}",
+    " {{ Content }} {{ Title }} ",
+    " {{ Title }}  {{ Title }} ",
+    "{{ Content }} {{ Content }} {{ Title }} ",
+    "<p> {{ Title }} {{ Con</p> {{ Title }} tent }}",
+]
+
+TRICKY_TITLES = [
+    "My Blog",
+    "",
+    " ",
+    "tent }}",
+    " {{ Content }}",
+    "{{ Con",
+    "nt }} {{ Conte",
+    "<b>&</b>",
+]
+
+
+def substitute(text, title, content):
+    return text.replace(" {{ Title }} ", title).replace(" {{ Content }}", content)
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render(self):
+        template = Template(TEMPLATE)
+        result = template.render("My Blog", "<div><p>Hi</p></div>")
+        expected_result = (
+            "<html>\n<head><title>My Blog</title></head>\n<body>\n"
+            "   <div><p>Hi</p></div>\n</body>\n</html>"
+        )
+        self.assertEqual(result, expected_result)
+        self.assertEqual(template.content_slots, 1)
+
+    def test_render_matches_substitution(self):
+        for text in TRICKY_TEMPLATES:
+            template = Template(text)
+            for title in TRICKY_TITLES:
+                with self.subTest(text=text, title=title):
+                    expected_result = substitute(text, title, "<div>x</div>")
+                    self.assertEqual(template.render(title, "<div>x</div>"), expected_result)
+
+    def test_placeholder_across_two_title_slots(self):
+        template = Template(" {{ Title }}  {{ Title }} ")
+        self.assertFalse(template.title_is_safe("nt }} {{ Conte"))
+        self.assertEqual(template.render("nt }} {{ Conte", "X"), "nt }}X {{ Conte")
+
+    def test_write_matches_render(self):
+        for text in TRICKY_TEMPLATES:
+            template = Template(text)
+            for title in TRICKY_TITLES:
+                with self.subTest(text=text, title=title):
+                    stream = io.StringIO()
+                    template.write(stream, title, iter(["<div>", "<p>x</p>", "</div>"]))
+                    expected_result = template.render(title, "<div><p>x</p></div>")
+                    self.assertEqual(stream.getvalue(), expected_result)
+
+    def test_pickle(self):
+        template = Template(TEMPLATE)
+        copy = pickle.loads(pickle.dumps(template))
+        self.assertEqual(copy.render("A", "B"), template.render("A", "B"))
+        self.assertEqual(copy.hash, template.hash)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -71,7 +71,7 @@ class TestTextNode(unittest.TestCase):
         with self.assertRaises(Exception):
             split_nodes_delimiter([SMALL_NODE, LARGE_NODE], "*", "other")
         with self.assertRaises(Exception):
-            delim_not_closed_node = TextNode("This is bold** text.", TextType.BOLD)
+            delim_not_closed_node = TextNode("This is bold** text.", TextType.TEXT)
             split_nodes_delimiter([delim_not_closed_node], "**", TextType.BOLD)
 
     def test_non_text_node(self):
@@ -79,6 +79,11 @@ class TestTextNode(unittest.TestCase):
         expected_result = split_nodes_delimiter([node], "**", TextType.BOLD)
         self.assertEqual([node], expected_result)
 
+    def test_non_text_node_with_unmatched_delimiter(self):
+        node = TextNode("2 * 3", TextType.CODE)
+        expected_result = split_nodes_delimiter([node], "*", TextType.ITALIC)
+        self.assertEqual([node], expected_result)
+
     def test_base_case(self):
         expected_result = [
             TextNode("This is text with a ", TextType.TEXT),
@@ -355,6 +360,27 @@ class TestTextNode(unittest.TestCase):
         ]
         self.assertEqual(split_node, expected_result)
 
+    def test_split_repeated_link(self):
+        node = TextNode(
+            "An image ![boot-dev](https://www.boot.dev) and a link [boot-dev](https://www.boot.dev)",
+            TextType.TEXT,
+        )
+        split_node = split_nodes_link([node])
+        expected_result = [
+            TextNode("An image ![boot-dev](https://www.boot.dev) and a link ", TextType.TEXT),
+            TextNode("boot-dev", TextType.LINK, url="https://www.boot.dev"),
+        ]
+        self.assertEqual(split_node, expected_result)
+
+        node = TextNode("[](https://www.boot.dev) twice: [](https://www.boot.dev)", TextType.TEXT)
+        split_node = split_nodes_link([node])
+        expected_result = [
+            TextNode("https://www.boot.dev", TextType.LINK, url="https://www.boot.dev"),
+            TextNode(" twice: ", TextType.TEXT),
+            TextNode("https://www.boot.dev", TextType.LINK, url="https://www.boot.dev"),
+        ]
+        self.assertEqual(split_node, expected_result)
+
     # ----- Series of Tests for Split Nodes Images -----
     def test_split_image(self):
         node = TextNode(
@@ -535,6 +561,34 @@ class TestTextNode(unittest.TestCase):
             node = text_to_textnodes(text)
             return node
 
+    def test_single_pass_matches_pipeline(self):
+        text = LARGE_NODE.text + " [a link](https://boot.dev) and ![an image](gus.jpg)"
+        nodes = split_nodes_link([TextNode(text, TextType.TEXT)])
+        nodes = split_nodes_image(nodes)
+        nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+        nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
+        nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+        self.assertEqual(text_to_textnodes(text), nodes)
+
+    def test_delimiters_inside_code_are_literal(self):
+        text = "Multiply with `a * b` and **bold [not a link](url)**"
+        nodes = text_to_textnodes(text)
+        expected_result = [
+            TextNode("Multiply with ", TextType.TEXT),
+            TextNode("a * b", TextType.CODE),
+            TextNode(" and ", TextType.TEXT),
+            TextNode("bold [not a link](url)", TextType.BOLD),
+        ]
+        self.assertEqual(nodes, expected_result)
+
+    def test_empty_link_text_uses_url(self):
+        nodes = text_to_textnodes("See [](https://boot.dev)")
+        expected_result = [
+            TextNode("See ", TextType.TEXT),
+            TextNode("https://boot.dev", TextType.LINK, url="https://boot.dev"),
+        ]
+        self.assertEqual(nodes, expected_result)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,359 @@
+import buildlog
+import gzip
+import os
+import tempfile
+import unittest
+from io import StringIO
+from unittest.mock import patch
+import markdown_to_html
+import utils
+from block_cache import BlockCache
+from utils import (
+    copy_content,
+    find_pages,
+    generate_page,
+    generate_page_streaming,
+    generate_pages_recursive,
+    get_file,
+    put_file,
+    sync_content,
+)
+from manifest import BuildManifest
+
+
+TEMPLATE = """<!doctype html>
+<html>
+<head>
+    <title> {{ Title }} </title>
+</head>
+<body>
+    <article>
+    {{ Content }}
+    </article>
+</body>
+</html>
+"""
+
+MARKDOWN = """
+# Streaming test
+
+A paragraph with **bold** text and a [link](https://www.boot.dev).
+
+- First item
+- Second item
+
+```
+code block
+```
+"""
+
+
+class TestUtils(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.template_path = os.path.join(self.root, "template.html")
+        self.md_path = os.path.join(self.root, "content", "index.md")
+        put_file(self.template_path, TEMPLATE)
+        put_file(self.md_path, MARKDOWN)
+        buildlog.configure(stream=StringIO())
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        buildlog.configure()
+
+    def render(self, func, template_path=None):
+        dest_path = os.path.join(self.root, "public", func.__name__, "index.html")
+        func(self.md_path, template_path or self.template_path, dest_path)
+        return get_file(dest_path)
+
+    def test_generate_page(self):
+        html = self.render(generate_page)
+        self.assertIn("<title>Streaming test</title>", html)
+        self.assertIn("<h1>Streaming test</h1>", html)
+
+    def test_streaming_matches_generate_page(self):
+        self.assertEqual(self.render(generate_page_streaming), self.render(generate_page))
+
+    def test_streaming_two_content_slots(self):
+        template_path = os.path.join(self.root, "two_slots.html")
+        put_file(template_path, TEMPLATE + " {{ Content }}")
+        self.assertEqual(
+            self.render(generate_page_streaming, template_path),
+            self.render(generate_page, template_path),
+        )
+
+    def test_put_file_skips_unchanged_content(self):
+        file_path = os.path.join(self.root, "public", "page.html")
+        self.assertTrue(put_file(file_path, "<p>one</p>"))
+        os.utime(file_path, ns=(0, 0))
+        self.assertFalse(put_file(file_path, "<p>one</p>"))
+        self.assertEqual(os.stat(file_path).st_mtime_ns, 0)
+        self.assertTrue(put_file(file_path, "<p>two</p>"))
+        self.assertTrue(put_file(file_path, "<p>three</p>"))
+        self.assertEqual(get_file(file_path), "<p>three</p>")
+        self.assertEqual(os.listdir(os.path.dirname(file_path)), ["page.html"])
+
+    def test_unchanged_pages_are_not_rewritten(self):
+        for func in (generate_page, generate_page_streaming):
+            dest_path = os.path.join(self.root, "public", func.__name__, "index.html")
+            self.assertTrue(func(self.md_path, self.template_path, dest_path))
+            os.utime(dest_path, ns=(0, 0))
+            self.assertFalse(func(self.md_path, self.template_path, dest_path))
+            self.assertEqual(os.stat(dest_path).st_mtime_ns, 0)
+            self.assertEqual(os.listdir(os.path.dirname(dest_path)), ["index.html"])
+
+    def test_put_file_gzip_sidecar(self):
+        file_path = os.path.join(self.root, "public", "page.html")
+        sidecar_path = file_path + ".gz"
+        put_file(file_path, "<p>one</p>", gzip_level=6)
+        with open(sidecar_path, "rb") as f:
+            compressed = f.read()
+        self.assertEqual(gzip.decompress(compressed), b"<p>one</p>")
+        self.assertEqual(compressed, gzip.compress(b"<p>one</p>", compresslevel=6, mtime=0))
+        os.utime(sidecar_path, ns=(0, 0))
+        self.assertFalse(put_file(file_path, "<p>one</p>", gzip_level=6))
+        self.assertEqual(os.stat(sidecar_path).st_mtime_ns, 0)
+        put_file(file_path, "<p>two</p>", gzip_level=6)
+        with open(sidecar_path, "rb") as f:
+            self.assertEqual(gzip.decompress(f.read()), b"<p>two</p>")
+        put_file(file_path, "<p>three</p>")
+        self.assertFalse(os.path.exists(sidecar_path))
+
+    def test_parallel_build_writes_gzip_sidecars(self):
+        for i in range(3):
+            put_file(os.path.join(self.root, "content", f"post{i}", "index.md"), MARKDOWN)
+        put_file(os.path.join(self.root, "content", "notes.txt"), "not markdown")
+        dest_dir = os.path.join(self.root, "public")
+        generate_pages_recursive(
+            os.path.join(self.root, "content"),
+            self.template_path,
+            dest_dir,
+            jobs=2,
+            gzip_level=9,
+        )
+        for output in ("index.html", os.path.join("post2", "index.html"), "notes.txt"):
+            output_path = os.path.join(dest_dir, output)
+            with open(output_path + ".gz", "rb") as f:
+                self.assertEqual(gzip.decompress(f.read()).decode(), get_file(output_path))
+
+    def test_static_sidecars_are_compressed_by_the_page_pool(self):
+        put_file(os.path.join(self.root, "content", "post", "index.md"), MARKDOWN)
+        static = os.path.join(self.root, "static")
+        put_file(os.path.join(static, "index.css"), "body {}")
+        put_file(os.path.join(static, "logo.png"), "not compressible")
+        for name, copy_static in (("copied", copy_content), ("synced", sync_content)):
+            dest_dir = os.path.join(self.root, name)
+            compress = []
+            copy_static(static, dest_dir, gzip_level=9, compress=compress)
+            css_path = os.path.join(dest_dir, "index.css")
+            self.assertEqual(compress, [css_path])
+            self.assertFalse(os.path.exists(css_path + ".gz"))
+            generate_pages_recursive(
+                os.path.join(self.root, "content"),
+                self.template_path,
+                dest_dir,
+                jobs=2,
+                gzip_level=9,
+                compress=compress,
+            )
+            with open(css_path + ".gz", "rb") as f:
+                self.assertEqual(gzip.decompress(f.read()), b"body {}")
+            self.assertFalse(os.path.exists(os.path.join(dest_dir, "logo.png.gz")))
+
+    def build_site(self, name, **kwargs):
+        for i in range(6):
+            put_file(os.path.join(self.root, "content", f"post{i}", "index.md"), MARKDOWN)
+        put_file(os.path.join(self.root, "content", "notes.txt"), "not markdown")
+        dest_dir = os.path.join(self.root, name)
+        log = StringIO()
+        buildlog.configure(buildlog.VERBOSE, stream=log)
+        count = generate_pages_recursive(
+            os.path.join(self.root, "content"), self.template_path, dest_dir, **kwargs
+        )
+        buildlog.log.flush()
+        outputs = {}
+        for dir_path, _, file_names in os.walk(dest_dir):
+            for file_name in file_names:
+                path = os.path.join(dir_path, file_name)
+                outputs[os.path.relpath(path, dest_dir)] = get_file(path)
+        return count, outputs, log.getvalue().replace(name, "public")
+
+    def test_parallel_build_matches_serial(self):
+        serial = self.build_site("serial")
+        parallel = self.build_site("parallel", jobs=2)
+        self.assertEqual(serial[0], 7)
+        self.assertEqual(len(serial[1]), 8)
+        self.assertEqual(parallel, serial)
+
+    def test_streaming_build_matches_serial(self):
+        self.assertEqual(self.build_site("streamed", stream=True), self.build_site("serial"))
+
+    def test_rebuild_reports_pages_written(self):
+        log = self.build_site("public")[2]
+        self.assertIn("Generating page from", log)
+        self.assertIn("notes.txt", log)
+        self.assertEqual((buildlog.log.pages, buildlog.log.written, buildlog.log.assets), (7, 7, 1))
+        notes_path = os.path.join(self.root, "public", "notes.txt")
+        notes_stat = os.stat(notes_path)
+        self.build_site("public")
+        self.assertEqual((buildlog.log.pages, buildlog.log.written, buildlog.log.assets), (7, 0, 0))
+        # The unchanged file wasn't copied again
+        self.assertEqual(os.stat(notes_path).st_ino, notes_stat.st_ino)
+        self.assertEqual(os.stat(notes_path).st_mtime_ns, notes_stat.st_mtime_ns)
+
+    def test_profiled_build(self):
+        for kwargs in ({}, {"jobs": 2}, {"stream": True}):
+            profiler = utils.enable_profiling()
+            try:
+                self.build_site("public", **kwargs)
+            finally:
+                utils.disable_profiling()
+            self.assertEqual(len(profiler.pages), 7)
+            phases = ("title", "stream") if kwargs.get("stream") else ("read", "parse", "write")
+            self.assertTrue(set(phases) <= set(profiler.phase_stats()))
+
+    def test_profiled_page_renders_like_unprofiled(self):
+        cache = BlockCache()
+        expected = self.render(generate_page)
+        profiler = utils.enable_profiling()
+        try:
+            for _ in range(2):
+                dest_path = os.path.join(self.root, "public", "profiled.html")
+                generate_page(
+                    self.md_path, self.template_path, dest_path, verbose=False, block_cache=cache
+                )
+        finally:
+            utils.disable_profiling()
+        self.assertEqual(get_file(dest_path), expected)
+        self.assertEqual(cache.hits, 4)
+        phases = ["read", "parse", "to_html", "template", "write"]
+        self.assertEqual([list(timings) for _, timings in profiler.pages], [phases, phases])
+
+    def test_parallel_build_with_many_batches(self):
+        with patch("utils.JOB_BATCH_SIZE", 2), patch("utils.MAX_PENDING_BATCHES", 1):
+            parallel = self.build_site("parallel", jobs=2)
+        self.assertEqual(parallel, self.build_site("serial"))
+
+    def test_parallel_build_with_document_cache(self):
+        cache_dir = os.path.join(self.root, "cache")
+        cache = markdown_to_html.enable_document_cache(cache_dir)
+        try:
+            parallel = self.build_site("parallel", jobs=2)
+            cached = self.build_site("cached")
+        finally:
+            markdown_to_html.disable_document_cache()
+        serial = self.build_site("serial")
+        self.assertEqual(parallel, serial)
+        self.assertEqual(cached, serial)
+        # Every page has the same source, so the workers and the serial build share one entry
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+        self.assertEqual((cache.hits, cache.misses), (7, 0))
+
+    def test_find_pages_order(self):
+        content = os.path.join(self.root, "content")
+        put_file(os.path.join(content, "b", "c", "deep.md"), MARKDOWN)
+        put_file(os.path.join(content, "b", "a.png"), "")
+        put_file(os.path.join(content, "a.md"), MARKDOWN)
+        public = os.path.join("public", "b")
+        pages, files, dirs = find_pages(content, "public")
+        self.assertEqual(
+            pages,
+            [
+                (os.path.join(content, "a.md"), os.path.join("public", "a.html")),
+                (os.path.join(content, "b", "c", "deep.md"), os.path.join(public, "c", "deep.html")),
+                (self.md_path, os.path.join("public", "index.html")),
+            ],
+        )
+        self.assertEqual(files, [(os.path.join(content, "b", "a.png"), public)])
+        self.assertEqual(dirs, [public, os.path.join(public, "c")])
+
+    def test_copy_content(self):
+        static = os.path.join(self.root, "static")
+        public = os.path.join(self.root, "public")
+        put_file(os.path.join(static, "index.css"), "body {}")
+        put_file(os.path.join(static, "images", "icons", "logo.svg"), "<svg></svg>")
+        put_file(os.path.join(public, "stale.html"), "old")
+        copy_content(static, public)
+        self.assertFalse(os.path.exists(os.path.join(public, "stale.html")))
+        logo_path = os.path.join(public, "images", "icons", "logo.svg")
+        self.assertEqual(get_file(logo_path), "<svg></svg>")
+
+
+class TestSyncContent(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        put_file(os.path.join(self.static, "index.css"), "body {}")
+        put_file(os.path.join(self.static, "images", "logo.svg"), "<svg></svg>")
+        put_file(os.path.join(self.public, "index.html"), "<p>generated page</p>")
+        self.manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        buildlog.configure(stream=StringIO())
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        buildlog.configure()
+
+    def sync(self, **kwargs):
+        return sync_content(self.static, self.public, manifest=self.manifest, **kwargs)
+
+    def test_only_changed_files_are_copied(self):
+        self.assertEqual(self.sync(), (2, 0, 0))
+        self.assertEqual(self.sync(), (0, 2, 0))
+        put_file(os.path.join(self.static, "index.css"), "body { color: red; }")
+        self.assertEqual(self.sync(), (1, 1, 0))
+        self.assertEqual(get_file(os.path.join(self.public, "index.css")), "body { color: red; }")
+        self.assertEqual(get_file(os.path.join(self.public, "index.html")), "<p>generated page</p>")
+
+    def test_stale_files_are_removed(self):
+        self.sync()
+        os.remove(os.path.join(self.static, "images", "logo.svg"))
+        self.assertEqual(self.sync(), (0, 1, 1))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images", "logo.svg")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.html")))
+
+    def test_checksum(self):
+        self.sync()
+        source_path = os.path.join(self.static, "index.css")
+        stat = os.stat(source_path)
+        os.utime(source_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(self.sync(checksum=True), (0, 2, 0))
+        self.assertEqual(self.sync(), (0, 2, 0))
+
+    def test_gzip_sidecars(self):
+        css_gzip_path = os.path.join(self.public, "index.css.gz")
+        self.sync(gzip_level=9)
+        with open(css_gzip_path, "rb") as f:
+            self.assertEqual(gzip.decompress(f.read()), b"body {}")
+        self.assertTrue(os.path.exists(os.path.join(self.public, "images", "logo.svg.gz")))
+        os.utime(css_gzip_path, ns=(0, 0))
+        self.sync(gzip_level=9)
+        self.assertEqual(os.stat(css_gzip_path).st_mtime_ns, 0)
+        os.remove(os.path.join(self.static, "index.css"))
+        self.sync(gzip_level=9)
+        self.assertFalse(os.path.exists(css_gzip_path))
+
+    def test_gzip_level_change_rewrites_sidecars(self):
+        css_gzip_path = os.path.join(self.public, "index.css.gz")
+        self.sync(gzip_level=1)
+        self.sync(gzip_level=9)
+        with open(css_gzip_path, "rb") as f:
+            self.assertEqual(f.read(), gzip.compress(b"body {}", compresslevel=9, mtime=0))
+        self.sync()
+        self.assertFalse(os.path.exists(css_gzip_path))
+        self.assertEqual(self.manifest.gzip_level, None)
+
+    def test_hardlink(self):
+        self.sync(link="hard")
+        source_stat = os.stat(os.path.join(self.static, "index.css"))
+        dest_stat = os.stat(os.path.join(self.public, "index.css"))
+        self.assertEqual(source_stat.st_ino, dest_stat.st_ino)
+
+    def test_reflink(self):
+        self.assertEqual(self.sync(link="reflink"), (2, 0, 0))
+        self.assertEqual(get_file(os.path.join(self.public, "index.css")), "body {}")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+import buildlog
+import http.client
+import os
+import tempfile
+import threading
+import unittest
+import urllib.request
+from io import StringIO
+from manifest import BuildManifest
+from utils import get_file, put_file, sync_content
+from watch import LIVE_RELOAD_SCRIPT, LiveReload, SiteWatcher, inject_live_reload, make_server
+
+
+TEMPLATE = "<html><title> {{ Title }} </title><body> {{ Content }}</body></html>"
+
+
+class TestSiteWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.public = os.path.join(self.root, "public")
+        self.template_path = os.path.join(self.root, "template.html")
+        put_file(self.template_path, TEMPLATE)
+        put_file(os.path.join(self.content, "index.md"), "# Home\n\nWelcome")
+        put_file(os.path.join(self.content, "blog", "post.md"), "# Post\n\nFirst draft")
+        put_file(os.path.join(self.static, "index.css"), "body {}")
+        self.watcher = SiteWatcher(
+            self.content,
+            self.static,
+            self.template_path,
+            self.public,
+            os.path.join(self.root, "manifest.json"),
+        )
+        buildlog.configure(stream=StringIO())
+        self.watcher.build()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        buildlog.configure()
+
+    def edit(self, file_path, text):
+        """Writes text to file_path with an mtime the watcher can't mistake for the old one"""
+        put_file(file_path, text)
+        stat = os.stat(file_path)
+        os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    def test_nothing_changed(self):
+        self.assertEqual(self.watcher.poll(), [])
+
+    def test_changed_page_is_rendered_alone(self):
+        self.edit(os.path.join(self.content, "blog", "post.md"), "# Post\n\nSecond draft")
+        post_path = os.path.join(self.public, "blog", "post.html")
+        self.assertEqual(self.watcher.poll(), [post_path])
+        self.assertIn("<p>Second draft</p>", get_file(post_path))
+        self.assertEqual(self.watcher.poll(), [])
+
+    def test_edits_only_render_changed_blocks(self):
+        post_md = os.path.join(self.content, "blog", "post.md")
+        post_path = os.path.join(self.public, "blog", "post.html")
+        self.edit(post_md, "# Post\n\nSecond draft\n\n- a list")
+        self.watcher.poll()
+        self.edit(post_md, "# Post\n\nThird draft\n\n- a list")
+        self.watcher.poll()
+        self.assertEqual((self.watcher.block_cache.hits, self.watcher.block_cache.misses), (2, 4))
+        self.assertIn("<p>Third draft</p><ul><li>a list</li></ul>", get_file(post_path))
+        os.remove(post_md)
+        self.watcher.poll()
+        self.assertEqual(len(self.watcher.block_cache), 0)
+
+    def test_resaved_page_is_not_reported(self):
+        self.edit(os.path.join(self.content, "blog", "post.md"), "# Post\n\nFirst draft")
+        self.assertEqual(self.watcher.poll(), [])
+
+    def test_changed_asset_is_copied(self):
+        self.edit(os.path.join(self.static, "index.css"), "body { color: red; }")
+        css_path = os.path.join(self.public, "index.css")
+        self.assertEqual(self.watcher.poll(), [css_path])
+        self.assertEqual(get_file(css_path), "body { color: red; }")
+
+    def test_incremental_build_after_watching_keeps_assets(self):
+        self.edit(os.path.join(self.static, "index.css"), "body { color: red; }")
+        self.watcher.poll()
+        manifest = BuildManifest.load(os.path.join(self.root, "manifest.json"))
+        css_path = os.path.join(self.public, "index.css")
+        self.assertEqual(list(manifest.assets), [css_path])
+        self.assertEqual(sync_content(self.static, self.public, manifest=manifest), (0, 1, 0))
+        self.assertEqual(get_file(css_path), "body { color: red; }")
+        self.assertEqual(list(manifest.assets), [css_path])
+
+    def test_template_change_rebuilds_every_page(self):
+        self.edit(self.template_path, TEMPLATE.replace("<body>", "<body><nav></nav>"))
+        self.assertEqual(self.watcher.poll(), [self.public])
+        for page in ("index.html", os.path.join("blog", "post.html")):
+            self.assertIn("<nav></nav>", get_file(os.path.join(self.public, page)))
+
+    def test_removed_page_is_deleted(self):
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        post_path = os.path.join(self.public, "blog", "post.html")
+        self.assertEqual(self.watcher.poll(), [post_path])
+        self.assertFalse(os.path.exists(post_path))
+
+    def test_broken_page_does_not_stop_the_watcher(self):
+        self.edit(os.path.join(self.content, "index.md"), "No title here")
+        self.assertEqual(self.watcher.poll(), [])
+        self.edit(os.path.join(self.content, "index.md"), "# Home\n\nFixed")
+        self.assertEqual(self.watcher.poll(), [os.path.join(self.public, "index.html")])
+
+    def test_missing_template_is_unchanged(self):
+        os.remove(self.template_path)
+        self.assertEqual(self.watcher.poll(), [])
+        self.edit(self.template_path, TEMPLATE)
+        self.assertEqual(self.watcher.poll(), [self.public])
+        self.assertEqual(buildlog.log.errors, 0)
+
+    def test_failed_rebuild_does_not_stop_the_watcher(self):
+        index_md = os.path.join(self.content, "index.md")
+        self.edit(index_md, "No title here")
+        self.edit(self.template_path, TEMPLATE.replace("<body>", "<body><nav></nav>"))
+        self.assertEqual(self.watcher.poll(), [self.public])
+        self.assertEqual(buildlog.log.errors, 1)
+        self.edit(index_md, "# Home\n\nFixed")
+        self.assertEqual(self.watcher.poll(), [self.public])
+        self.assertEqual(buildlog.log.errors, 0)
+        for page in ("index.html", os.path.join("blog", "post.html")):
+            self.assertIn("<nav></nav>", get_file(os.path.join(self.public, page)))
+
+
+class TestLiveReload(unittest.TestCase):
+    def test_inject_live_reload(self):
+        self.assertEqual(
+            inject_live_reload(b"<body><p>hi</p></body>"),
+            b"<body><p>hi</p>" + LIVE_RELOAD_SCRIPT.encode() + b"</body>",
+        )
+        self.assertEqual(
+            inject_live_reload(b"<p>hi</p>"), b"<p>hi</p>" + LIVE_RELOAD_SCRIPT.encode()
+        )
+
+    def test_wait(self):
+        live_reload = LiveReload()
+        self.assertEqual(live_reload.wait(0, timeout=0.01), 0)
+        threading.Timer(0.01, live_reload.notify).start()
+        self.assertEqual(live_reload.wait(0, timeout=5), 1)
+
+    def test_server_injects_script(self):
+        with tempfile.TemporaryDirectory() as public:
+            put_file(os.path.join(public, "index.html"), "<body><p>hi</p></body>")
+            put_file(os.path.join(public, "index.css"), "</body>")
+            server = make_server(public, LiveReload(), port=0)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            url = f"http://127.0.0.1:{server.server_address[1]}"
+            try:
+                with urllib.request.urlopen(f"{url}/") as response:
+                    self.assertIn(LIVE_RELOAD_SCRIPT, response.read().decode())
+                with urllib.request.urlopen(f"{url}/index.css") as response:
+                    self.assertEqual(response.read(), b"</body>")
+            finally:
+                server.shutdown()
+                server.server_close()
+
+    def test_server_redirects_directory_without_slash(self):
+        with tempfile.TemporaryDirectory() as public:
+            put_file(os.path.join(public, "blog", "index.html"), "<body><p>blog</p></body>")
+            server = make_server(public, LiveReload(), port=0)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+            try:
+                connection.request("GET", "/blog?draft=1")
+                response = connection.getresponse()
+                response.read()
+                self.assertEqual(response.status, 301)
+                self.assertEqual(response.getheader("Location"), "/blog/?draft=1")
+                connection.request("GET", "/blog/")
+                response = connection.getresponse()
+                self.assertEqual(response.status, 200)
+                self.assertIn(LIVE_RELOAD_SCRIPT, response.read().decode())
+            finally:
+                connection.close()
+                server.shutdown()
+                server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()